@@ -1,7 +1,84 @@
 import numpy as np
 from fetchStocks import StockData
 import pandas as pd
+from parameterTypes import path_dependent
+from runningStats import RunningReturns, extended_return_moments
 
+class BootstrapEstimator:
+    """
+    Incremental Bootstrap estimator for all paths at once, numerically equivalent to recomputing the
+    returns over the history and the simulated path on every step (including the np.roll wrap-around return).
+    """
+
+    log_returns = False
+
+    def __init__(self, stock: StockData, T, dt, num_paths):
+        """
+        Initializes the estimator from the historical closing prices.
+
+        Args:
+            stock (StockData): Object containing historical stock data.
+            T (float): Time horizon (in years) for simulation.
+            dt (float): Time step (in years) for simulation.
+            num_paths (int): Number of simulated paths.
+
+        Returns:
+            None
+        """
+        self.dt = dt
+        self.stats = RunningReturns(stock.getClosingPrices(), num_paths, self.log_returns, stock.getReturns(self.log_returns))
+
+    def update(self, prices):
+        """
+        Adds the newest simulated price of every path.
+
+        Args:
+            prices (numpy.ndarray): Newest simulated price of each path.
+
+        Returns:
+            None
+        """
+        self.stats.update(prices)
+
+class MuBootstrapEstimator(BootstrapEstimator):
+    """
+    Vectorized counterpart of muBootstrap.
+    """
+
+    kernel = "circular_mean_simple"
+
+    def estimate(self):
+        """
+        Returns:
+            numpy.ndarray: Drift parameter (mu) for each path.
+        """
+        count, mean, m2 = self.stats.circular()
+        return mean / self.dt
+
+class Sigma1BootstrapEstimator(BootstrapEstimator):
+    """
+    Vectorized counterpart of sigma1Bootstrap.
+    """
+
+    kernel = "circular_std_simple"
+
+    def estimate(self):
+        """
+        Returns:
+            numpy.ndarray: Volatility parameter (sigma1) for each path.
+        """
+        count, mean, m2 = self.stats.circular()
+        return np.sqrt(m2 / ((count - 1) * self.dt))
+
+class Sigma2BootstrapEstimator(Sigma1BootstrapEstimator):
+    """
+    Vectorized counterpart of sigma2Bootstrap.
+    """
+
+    kernel = "circular_std_log"
+    log_returns = True
+
+@path_dependent(vectorized=MuBootstrapEstimator)
 def muBootstrap(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Calculate the drift parameter (mu) using Bootstrap method.
@@ -17,20 +94,18 @@ def muBootstrap(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex
     Returns:
         float: Drift parameter (mu).
     """
-    # Calculate stock returns
-
-    combined = np.append(stock.getClosingPrices(), estimations[pathIndex, : futureTimeIndex])
-    
-    returns = (combined - np.roll(combined, 1)) / np.roll(combined, 1)
+    # Calculate stock returns (the history's come from the sums cached on the stock)
+    count, mean, m2 = extended_return_moments(stock, estimations[pathIndex, : futureTimeIndex], circular=True)
 
     # Calculate mu
-    mu = returns.mean() / dt
+    mu = mean / dt
 
     return mu
 
 import numpy as np
 from fetchStocks import StockData
 
+@path_dependent(vectorized=Sigma1BootstrapEstimator)
 def sigma1Bootstrap(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Calculate the volatility parameter (sigma1) using Bootstrap method.
@@ -46,16 +121,15 @@ def sigma1Bootstrap(stock: StockData, estimations, T, dt, pathIndex, futureTimeI
     Returns:
         float: Volatility parameter (sigma1).
     """
-    # Calculate stock returns
-    combined = np.append(stock.getClosingPrices(), estimations[pathIndex, : futureTimeIndex])
-    
-    returns = (combined - np.roll(combined, 1)) / np.roll(combined, 1) 
+    # Calculate stock returns (the history's come from the sums cached on the stock)
+    count, mean, m2 = extended_return_moments(stock, estimations[pathIndex, : futureTimeIndex], circular=True)
 
     # Calculate sigma1 (Common Volatility)
-    sigma1 = np.sqrt(((returns - returns.mean())**2).sum() / ((len(returns) - 1) * dt))
+    sigma1 = np.sqrt(m2 / ((count - 1) * dt))
     
     return sigma1
 
+@path_dependent(vectorized=Sigma2BootstrapEstimator)
 def sigma2Bootstrap(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Calculate the volatility parameter (sigma2) using Bootstrap method.
@@ -71,12 +145,10 @@ def sigma2Bootstrap(stock: StockData, estimations, T, dt, pathIndex, futureTimeI
     Returns:
         float: Volatility parameter (sigma2).
     """
-    # Calculate log returns
-    combined = np.append(stock.getClosingPrices(), estimations[pathIndex, : futureTimeIndex])
-    
-    log_returns = np.log(combined) - np.log(np.roll(combined, 1))
+    # Calculate log returns (the history's come from the sums cached on the stock)
+    count, mean, m2 = extended_return_moments(stock, estimations[pathIndex, : futureTimeIndex], log_returns=True, circular=True)
     
     # Calculate sigma2 (Log Volatility)
-    sigma2 = np.sqrt(((log_returns - log_returns.mean())**2).sum() / ((len(log_returns) - 1) * dt))
+    sigma2 = np.sqrt(m2 / ((count - 1) * dt))
     
     return sigma2
@@ -1,8 +1,10 @@
 import numpy as np
 from fetchStocks import StockData
 import pandas as pd
+from parameterTypes import static
 
 
+@static
 def muCAPM(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Calculate the drift parameter (mu) for the Geometric Brownian Motion (GBM) model using the Capital Asset Pricing Model (CAPM).
@@ -24,6 +26,7 @@ def muCAPM(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
 
     return mu
 
+@static
 def sigmaCAPM(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Calculate the volatility parameter (sigma) for the Geometric Brownian Motion (GBM) model using the Capital Asset Pricing Model (CAPM).
@@ -41,10 +44,10 @@ def sigmaCAPM(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
 
     # Calculate daily returns
-    daily_returns = stock.stock_data_df['Close'].pct_change().dropna()
+    daily_returns = stock.getReturns()
 
     # Calculate daily standard deviation
-    s = daily_returns.std()
+    s = np.std(daily_returns, ddof=1)
 
     # Calculate annualized volatility
     tau = T * dt
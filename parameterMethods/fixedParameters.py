@@ -1,5 +1,7 @@
 from fetchStocks import StockData
+from parameterTypes import static
 
+@static
 def muFixedParam(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Calculate the drift parameter (mu) for the Geometric Brownian Motion (GBM) model using a fixed parameter.
@@ -17,6 +19,7 @@ def muFixedParam(stock: StockData, estimations, T, dt, pathIndex, futureTimeInde
     """
     return 0.08
 
+@static
 def sigmaFixedParam(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Calculate the volatility parameter (sigma) for the Geometric Brownian Motion (GBM) model using a fixed parameter.
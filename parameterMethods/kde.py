@@ -1,7 +1,10 @@
 import numpy as np
 from sklearn.neighbors import KernelDensity
 from fetchStocks import StockData
+from parameterTypes import path_dependent
 
+# Not static: a fresh sample is drawn from the KDE on every call
+@path_dependent
 def muKDE(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Calculate the drift parameter (mu) using Kernel Density Estimation (KDE) method.
@@ -18,10 +21,10 @@ def muKDE(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
         float: Drift parameter (mu) estimate.
     """
     # Extract daily returns
-    daily_returns = stock.stock_data_df['Adj Close'].pct_change().dropna()
+    daily_returns = stock.getReturns(adjusted=True)
 
     # Initialize and fit Kernel Density Estimation (KDE) to daily returns
-    kde = KernelDensity(kernel='gaussian').fit(daily_returns.values.reshape(-1, 1))
+    kde = KernelDensity(kernel='gaussian').fit(daily_returns.reshape(-1, 1))
 
     # Sample from KDE to estimate mu
     mu_samples = np.exp(kde.sample())
@@ -29,6 +32,7 @@ def muKDE(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     # Return mean of the samples as the estimate for mu
     return np.mean(mu_samples)
 
+@path_dependent
 def sigmaKDE(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Calculate the volatility parameter (sigma) using Kernel Density Estimation (KDE) method.
@@ -45,10 +49,10 @@ def sigmaKDE(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
         float: Volatility parameter (sigma) estimate.
     """
     # Extract daily returns
-    daily_returns = stock.stock_data_df['Adj Close'].pct_change().dropna()
+    daily_returns = stock.getReturns(adjusted=True)
 
     # Initialize and fit Kernel Density Estimation (KDE) to daily returns
-    kde = KernelDensity(kernel='gaussian').fit(daily_returns.values.reshape(-1, 1))
+    kde = KernelDensity(kernel='gaussian').fit(daily_returns.reshape(-1, 1))
 
     # Sample from KDE to estimate sigma
     sigma_samples = np.exp(kde.sample())
@@ -1,6 +1,71 @@
 import numpy as np
 from fetchStocks import StockData
+from parameterTypes import path_dependent
+from runningStats import RunningReturns, extended_return_moments
 
+class MomentsEstimator:
+    """
+    Incremental Method of Moments estimator for all paths at once, numerically equivalent to recomputing
+    the log returns over the history and the simulated path on every step.
+    """
+
+    def __init__(self, stock: StockData, T, dt, num_paths):
+        """
+        Initializes the estimator from the historical closing prices.
+
+        Args:
+            stock (StockData): Object containing historical stock data.
+            T (float): Time horizon (in years) for simulation.
+            dt (float): Time step (in years) for simulation.
+            num_paths (int): Number of simulated paths.
+
+        Returns:
+            None
+        """
+        self.dt = dt
+        self.stats = RunningReturns(stock.getClosingPrices(), num_paths, log_returns=True, history_returns=stock.getReturns(log_returns=True))
+
+    def update(self, prices):
+        """
+        Adds the newest simulated price of every path.
+
+        Args:
+            prices (numpy.ndarray): Newest simulated price of each path.
+
+        Returns:
+            None
+        """
+        self.stats.update(prices)
+
+class MuMomentsEstimator(MomentsEstimator):
+    """
+    Vectorized counterpart of muMethodOfMoments.
+    """
+
+    kernel = "mean_log"
+
+    def estimate(self):
+        """
+        Returns:
+            numpy.ndarray: Estimated drift parameter (mu) for each path.
+        """
+        return self.stats.mean / self.dt
+
+class SigmaMomentsEstimator(MomentsEstimator):
+    """
+    Vectorized counterpart of sigmaMethodOfMoments.
+    """
+
+    kernel = "population_std_log"
+
+    def estimate(self):
+        """
+        Returns:
+            numpy.ndarray: Estimated volatility parameter (sigma) for each path.
+        """
+        return np.sqrt(self.stats.m2 / self.stats.count) / np.sqrt(self.dt)
+
+@path_dependent(vectorized=MuMomentsEstimator)
 def muMethodOfMoments(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Estimate the drift parameter (mu) using the Method of Moments.
@@ -16,15 +81,15 @@ def muMethodOfMoments(stock: StockData, estimations, T, dt, pathIndex, futureTim
     Returns:
         float: Estimated drift parameter (mu).
     """
-    # Calculate stock returns
-    combined = np.append(stock.getClosingPrices(), estimations[pathIndex, : futureTimeIndex])
-    returns = (np.log(combined) - np.log(np.roll(combined, 1)))[1:]  # Log returns excluding the first NaN value
+    # Calculate stock log returns (the history's come from the sums cached on the stock)
+    count, mean, m2 = extended_return_moments(stock, estimations[pathIndex, : futureTimeIndex], log_returns=True)
 
     # Use the sample mean as the estimate for mu
-    mu = np.mean(returns) / dt
+    mu = mean / dt
 
     return mu
 
+@path_dependent(vectorized=SigmaMomentsEstimator)
 def sigmaMethodOfMoments(stock: StockData, estimations, T, dt, pathIndex, futureTimeIndex):
     """
     Estimate the volatility parameter (sigma) using the Method of Moments.
@@ -40,11 +105,10 @@ def sigmaMethodOfMoments(stock: StockData, estimations, T, dt, pathIndex, future
     Returns:
         float: Estimated volatility parameter (sigma).
     """
-    # Calculate stock returns
-    combined = np.append(stock.getClosingPrices(), estimations[pathIndex, : futureTimeIndex])
-    returns = (np.log(combined) - np.log(np.roll(combined, 1)))[1:]  # Log returns excluding the first NaN value
+    # Calculate stock log returns (the history's come from the sums cached on the stock)
+    count, mean, m2 = extended_return_moments(stock, estimations[pathIndex, : futureTimeIndex], log_returns=True)
 
     # Use the sample standard deviation as the estimate for sigma
-    sigma = np.std(returns) / np.sqrt(dt)
+    sigma = np.sqrt(m2 / count) / np.sqrt(dt)
 
     return sigma
@@ -0,0 +1,126 @@
+import numpy as np
+
+class RunningReturns:
+    """
+    Running mean and sum of squared deviations (Welford) of the returns of a price series that
+    continues with simulated prices, tracked for every path at once.
+
+    The history is shared by all paths, so it is summarised once; each new simulated price then
+    updates the statistics in O(1) per path instead of recomputing them over the whole history.
+
+    Attributes:
+        count (int): Number of returns included so far (the same for every path).
+        mean (numpy.ndarray): Running mean of the returns for each path.
+        m2 (numpy.ndarray): Running sum of squared deviations from the mean for each path.
+        first_price (float): First historical price.
+        last_price (numpy.ndarray): Most recent price of each path.
+        log_returns (bool): True if log returns are tracked, False for simple returns.
+    """
+
+    def __init__(self, history_prices, num_paths, log_returns = False, history_returns = None):
+        """
+        Initializes the running statistics from the historical prices.
+
+        Args:
+            history_prices (numpy.ndarray): Historical closing prices.
+            num_paths (int): Number of simulated paths.
+            log_returns (bool): Track log returns instead of simple returns. Default is False.
+            history_returns (numpy.ndarray, optional): Returns of the historical prices if already computed
+                (e.g. StockData.getReturns). Defaults to None (computed here).
+
+        Returns:
+            None
+        """
+        self.log_returns = log_returns
+        history_prices = np.asarray(history_prices, dtype=float)
+        if history_returns is None:
+            history_returns = self.returns(history_prices[:-1], history_prices[1:])
+        returns = history_returns
+
+        self.count = len(returns)
+        self.mean = np.full(num_paths, returns.mean() if self.count else 0.0)
+        self.m2 = np.full(num_paths, ((returns - returns.mean())**2).sum() if self.count else 0.0)
+        self.first_price = history_prices[0]
+        self.last_price = np.full(num_paths, history_prices[-1])
+
+    def returns(self, previous_prices, prices):
+        """
+        Computes returns between two arrays of prices.
+
+        Args:
+            previous_prices (numpy.ndarray): Prices at the earlier time.
+            prices (numpy.ndarray): Prices at the later time.
+
+        Returns:
+            numpy.ndarray: Simple or log returns.
+        """
+        if self.log_returns:
+            return np.log(prices) - np.log(previous_prices)
+        return (prices - previous_prices) / previous_prices
+
+    def update(self, prices):
+        """
+        Adds the return to the newest simulated price of every path.
+
+        Args:
+            prices (numpy.ndarray): Newest simulated price of each path.
+
+        Returns:
+            None
+        """
+        r = self.returns(self.last_price, prices)
+        self.count += 1
+        delta = r - self.mean
+        self.mean = self.mean + delta / self.count
+        self.m2 = self.m2 + delta * (r - self.mean)
+        self.last_price = np.array(prices, dtype=float)
+
+    def circular(self):
+        """
+        Returns the statistics with the wrap-around return from the newest price back to the first
+        historical price included, matching estimators that compute returns with np.roll.
+
+        Returns:
+            tuple: (count, mean, m2) including the wrap-around return.
+        """
+        r = self.returns(self.last_price, self.first_price)
+        count = self.count + 1
+        delta = r - self.mean
+        mean = self.mean + delta / count
+        m2 = self.m2 + delta * (r - mean)
+        return count, mean, m2
+
+def extended_return_moments(stock, simulated_prices, log_returns = False, circular = False):
+    """
+    Computes the count, mean and sum of squared deviations of the returns of the historical closing prices
+    continued by one path of simulated prices.
+
+    The history is read from the running sums cached on the StockData object, so only the simulated
+    part is traversed: O(len(simulated_prices)) rather than O(len(history)).
+
+    Args:
+        stock (StockData): Object containing historical stock data.
+        simulated_prices (numpy.ndarray): Simulated prices following the history.
+        log_returns (bool): Use log returns instead of simple returns. Default is False.
+        circular (bool): Include the wrap-around return from the newest price back to the first historical
+            price, matching estimators that compute returns with np.roll. Default is False.
+
+    Returns:
+        tuple: (count, mean, m2) of the returns.
+    """
+    history_prices = stock.getClosingPrices()
+    sums, sums_of_squares = stock.getReturnSums(log_returns)
+    prices = np.concatenate((history_prices[-1:], simulated_prices))
+    if circular:
+        prices = np.append(prices, history_prices[0])
+    if log_returns:
+        extra = np.log(prices[1:]) - np.log(prices[:-1])
+    else:
+        extra = (prices[1:] - prices[:-1]) / prices[:-1]
+
+    history_count = len(sums) - 1
+    count = history_count + len(extra)
+    mean = (sums[-1] + extra.sum()) / count
+    # Sum of squared deviations of the history from the overall mean, expanded in terms of the running sums
+    m2 = sums_of_squares[-1] - 2 * mean * sums[-1] + history_count * mean**2 + ((extra - mean)**2).sum()
+    return count, mean, m2
@@ -1,4 +1,5 @@
 import numpy as np
+from statistics import NormalDist
 
 def correlation_coefficient(true_prices, simulated_prices):
     """
@@ -25,24 +26,38 @@ def correlation_coefficient(true_prices, simulated_prices):
 
     return r
 
-def correlation_coefficient_multi(true_prices, simulated_prices_multi):
+def correlation_coefficients(true_prices, simulated_prices_multi):
     """
-    Calculate the correlation coefficient (r) between true and simulated prices for multiple paths.
+    Calculate the correlation coefficient (r) between true prices and each simulated path.
 
     Args:
         true_prices (numpy.ndarray): True stock prices.
-        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths (shape: num_paths x num_steps).
+        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths (shape: ... x num_paths x num_steps).
 
     Returns:
-        r (float): Correlation coefficient between true and simulated prices.
+        numpy.ndarray: Correlation coefficient of each path (shape: ... x num_paths).
     """
-    num_paths, num_steps = simulated_prices_multi.shape
-    correlations = np.zeros(num_paths)
+    true_centered = true_prices - np.mean(true_prices)
+    simulated_centered = simulated_prices_multi - np.mean(simulated_prices_multi, axis=-1, keepdims=True)
 
-    for i in range(num_paths):
-        correlations[i] = np.corrcoef(true_prices, simulated_prices_multi[i])[0, 1]
+    numerator = simulated_centered @ true_centered
+    denominator = np.sqrt(np.sum(simulated_centered ** 2, axis=-1) * np.sum(true_centered ** 2))
 
-    r = np.mean(correlations)
+    return numerator / denominator
+
+def correlation_coefficient_multi(true_prices, simulated_prices_multi):
+    """
+    Calculate the correlation coefficient (r) between true and simulated prices for multiple paths.
+
+    Args:
+        true_prices (numpy.ndarray): True stock prices.
+        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths (shape: num_paths x num_steps),
+            or for several methods at once (shape: num_methods x num_paths x num_steps).
+
+    Returns:
+        r (float or numpy.ndarray): Correlation coefficient between true and simulated prices (one per method for a stacked array).
+    """
+    r = np.mean(correlation_coefficients(true_prices, simulated_prices_multi), axis=-1)
 
     return r
 
@@ -69,18 +84,15 @@ def mean_absolute_percentage_error_multi(true_prices, simulated_prices_multi):
 
     Args:
         true_prices (numpy.ndarray): True stock prices.
-        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths (shape: num_paths x num_steps).
+        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths (shape: num_paths x num_steps),
+            or for several methods at once (shape: num_methods x num_paths x num_steps).
 
     Returns:
-        mape (float): Mean absolute percentage error between true and simulated prices.
+        mape (float or numpy.ndarray): Mean absolute percentage error between true and simulated prices (one per method for a stacked array).
     """
-    num_paths, num_steps = simulated_prices_multi.shape
-    absolute_percentage_errors = np.zeros((num_paths, num_steps))
+    absolute_percentage_errors = np.abs((true_prices - simulated_prices_multi) / true_prices)
 
-    for i in range(num_paths):
-        absolute_percentage_errors[i] = np.abs((true_prices - simulated_prices_multi[i]) / true_prices)
-
-    mape = np.mean(absolute_percentage_errors)
+    mape = np.mean(absolute_percentage_errors, axis=(-2, -1))
 
     return mape
 
@@ -108,20 +120,16 @@ def percentage_of_correct_predictions_multi(true_prices, simulated_prices_multi,
 
     Args:
         true_prices (numpy.ndarray): True stock prices.
-        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths (shape: num_paths x num_steps).
+        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths (shape: num_paths x num_steps),
+            or for several methods at once (shape: num_methods x num_paths x num_steps).
         threshold (float): Threshold for considering predictions correct.
 
     Returns:
-        percentage (float): Percentage of correct predictions within the threshold.
+        percentage (float or numpy.ndarray): Percentage of correct predictions within the threshold (one per method for a stacked array).
     """
-    num_paths, num_steps = simulated_prices_multi.shape
-    correct_predictions = np.zeros(num_steps)
+    absolute_errors = np.abs((true_prices - simulated_prices_multi) / true_prices)
 
-    for i in range(num_steps):
-        absolute_errors = np.abs((true_prices[i] - simulated_prices_multi[:, i]) / true_prices[i])
-        correct_predictions[i] = np.mean(absolute_errors <= threshold)
-
-    percentage = np.mean(correct_predictions) * 100
+    percentage = np.mean(absolute_errors <= threshold, axis=(-2, -1)) * 100
 
     return percentage
 
@@ -145,18 +153,25 @@ def analyzeAllSingle(true_prices, simulated_prices):
             ]
     return results
 
-def analyzeAllMulti(true_prices, simulated_prices_multi): 
+def analyzeAllMulti(true_prices, simulated_prices_multi, chunk_size=None): 
     """
     Analyzes multi-method simulations against true stock prices.
 
     Args:
         true_prices (numpy.ndarray): True stock prices.
-        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple methods.
+        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths, or a stacked
+            (num_methods x num_paths x num_steps) array to score several methods in one call.
+        chunk_size (int, optional): If given, read the paths (e.g. a numpy.memmap) this many at a time. Defaults to None.
 
     Returns:
         list: A list of tuples containing analysis results for each metric.
             Each tuple contains the name of the metric and its corresponding value.
     """
+    if chunk_size is not None:
+        accumulator = MetricsAccumulator(true_prices)
+        for start in range(0, len(simulated_prices_multi), chunk_size):
+            accumulator.update(simulated_prices_multi[start:start+chunk_size])
+        return accumulator.result()
     results = \
             [ \
                ("Correlation Coefficient", correlation_coefficient_multi(true_prices, simulated_prices_multi)),
@@ -165,26 +180,200 @@ def analyzeAllMulti(true_prices, simulated_prices_multi):
             ]
     return results
 
+def analyzeAllFused(true_prices, simulated_prices_multi, single_paths, chunk_size=None, threshold=0.1):
+    """
+    Computes every metric for the multiple paths and any number of single paths in one traversal of the paths.
+
+    Args:
+        true_prices (numpy.ndarray): True stock prices.
+        simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths (shape: num_paths x num_steps).
+        single_paths (list): Single paths to analyze (e.g. the mean, median and middle paths).
+        chunk_size (int, optional): If given, read the paths (e.g. a numpy.memmap) this many at a time. Defaults to None.
+        threshold (float): Threshold for considering predictions correct.
+
+    Returns:
+        tuple: (results for the multiple paths, list of results for each single path), in the formats of
+            analyzeAllMulti and analyzeAllSingle.
+    """
+    accumulator = MetricsAccumulator(true_prices, threshold)
+    if chunk_size is None:
+        chunk_size = max(1, len(simulated_prices_multi))
+    for start in range(0, len(simulated_prices_multi), chunk_size):
+        accumulator.update(simulated_prices_multi[start:start+chunk_size])
+
+    singles = np.stack(single_paths)
+    absolute_errors = np.abs((true_prices - singles) / true_prices)
+    correlations = correlation_coefficients(true_prices, singles)
+    mapes = np.mean(absolute_errors, axis=-1)
+    percentages = np.mean(absolute_errors <= threshold, axis=-1) * 100
+
+    single_results = [
+        [
+            ("Correlation Coefficient", correlations[k]),
+            ("MAPE", mapes[k]),
+            ("Percentage Inliers", percentages[k])
+        ]
+        for k in range(len(single_paths))
+    ]
+    return accumulator.result(), single_results
+
+def analyzeAllAnalytic(true_prices, initial_price, mu, sigma, times, single_paths, threshold=0.1):
+    """
+    Computes the metrics for constant-parameter GBM exactly, as the limit of infinitely many simulated paths.
+
+    At each step the price is lognormal, so the expected absolute error and the probability of landing within
+    the threshold have closed forms. The correlation of a random path with the true prices has none, so it is NaN.
+
+    Args:
+        true_prices (numpy.ndarray): True stock prices.
+        initial_price (float): Stock price at time 0.
+        mu (float): Drift parameter.
+        sigma (float): Volatility parameter.
+        times (numpy.ndarray): Time (in years) of each step.
+        single_paths (list): Single paths to analyze (e.g. the mean, median and middle paths).
+        threshold (float): Threshold for considering predictions correct.
+
+    Returns:
+        tuple: (results for the multiple paths, list of results for each single path), in the formats of
+            analyzeAllMulti and analyzeAllSingle.
+    """
+    cdf = np.vectorize(NormalDist().cdf, otypes=[float])
+    log_median = np.log(initial_price) + (mu - 0.5 * sigma**2) * times
+    spread = sigma * np.sqrt(times)
+    expected = initial_price * np.exp(mu * times)
+    random = spread > 0
+    safe_spread = np.where(random, spread, 1)
+
+    # E|S - c| = E[S] - c + 2 * (c * P(S <= c) - E[S; S <= c]) for lognormal S
+    z = (np.log(true_prices) - log_median) / safe_spread
+    expected_errors = expected - true_prices + 2 * (true_prices * cdf(z) - expected * cdf(z - safe_spread))
+    expected_errors = np.where(random, expected_errors, np.abs(true_prices - expected))
+    mape = np.mean(expected_errors / true_prices)
+
+    def probability_below(price):
+        return np.where(random, cdf((np.log(price) - log_median) / safe_spread), expected <= price)
+    inliers = probability_below(true_prices * (1 + threshold)) - probability_below(true_prices * (1 - threshold))
+    percentage = np.mean(inliers) * 100
+
+    multi_results = [
+        ("Correlation Coefficient", np.nan),
+        ("MAPE", mape),
+        ("Percentage Inliers", percentage)
+    ]
+    return multi_results, [analyzeAllSingle(true_prices, path) for path in single_paths]
+
 # Consider Improving This Function To Display It Nicer Or In A Better Format:
-def analyzeAll(simulation_data):
+def analyzeAll(simulation_data, chunk_size=None):
     """
     Analyzes simulation results for all methods.
 
+    The results are computed with analyzeAllFused and memoized on the simulation record under 'analysis',
+    so repeated tables and aggregations reuse them.
+
     Args:
         simulation_data (dict): Dictionary containing simulation data.
+        chunk_size (int, optional): If given, read the simulated paths this many at a time. Defaults to None.
 
     Returns:
         dict: A dictionary containing analysis results for each method.
             Each key corresponds to a method name, and each value is a list of tuples
             containing analysis results for that method.
     """
+    if 'analysis' in simulation_data:
+        return simulation_data['analysis']
+
     trueStockPrices = simulation_data['true_stock_prices']
-    return {
-        "Multi_Analysis" : analyzeAllMulti(trueStockPrices, simulation_data['simulation']),
-        "Mean_Analysis" : analyzeAllSingle(trueStockPrices, simulation_data['mean_path']),
-        "Median_Analysis" : analyzeAllSingle(trueStockPrices, simulation_data['median_path']),
-        "Middle_Analysis" : analyzeAllSingle(trueStockPrices, simulation_data['middle_path']),
+    # Paths simulated into a file are read in blocks rather than loaded whole
+    if chunk_size is None and isinstance(simulation_data['simulation'], np.memmap):
+        chunk_size = 10000
+    multiA, (meanA, medianA, middleA) = analyzeAllFused(
+        trueStockPrices,
+        simulation_data['simulation'],
+        [simulation_data['mean_path'], simulation_data['median_path'], simulation_data['middle_path']],
+        chunk_size)
+
+    simulation_data['analysis'] = {
+        "Multi_Analysis" : multiA,
+        "Mean_Analysis" : meanA,
+        "Median_Analysis" : medianA,
+        "Middle_Analysis" : middleA,
     }
+    return simulation_data['analysis']
+
+
 
+class MetricsAccumulator:
+    """
+    Online, mergeable accumulator for the multiple path metrics, so paths can be analyzed block by block.
 
+    Attributes:
+        true_prices (numpy.ndarray): True stock prices.
+        threshold (float): Threshold for considering predictions correct.
+        correlation_sum (float): Sum of the correlation coefficients of the paths seen.
+        error_sum (float): Sum of the absolute percentage errors of the paths seen.
+        inlier_sum (int): Number of predictions within the threshold.
+        count (int): Number of paths seen.
+    """
 
+    def __init__(self, true_prices, threshold=0.1):
+        """
+        Initializes an empty accumulator.
+
+        Args:
+            true_prices (numpy.ndarray): True stock prices.
+            threshold (float): Threshold for considering predictions correct.
+
+        Returns:
+            None
+        """
+        self.true_prices = true_prices
+        self.threshold = threshold
+        self.correlation_sum = 0.0
+        self.error_sum = 0.0
+        self.inlier_sum = 0
+        self.count = 0
+
+    def update(self, simulated_prices_multi):
+        """
+        Adds a block of paths.
+
+        Args:
+            simulated_prices_multi (numpy.ndarray): Simulated stock prices for multiple paths (shape: num_paths x num_steps).
+
+        Returns:
+            None
+        """
+        absolute_errors = np.abs((self.true_prices - simulated_prices_multi) / self.true_prices)
+        self.correlation_sum += np.sum(correlation_coefficients(self.true_prices, simulated_prices_multi))
+        self.error_sum += np.sum(absolute_errors)
+        self.inlier_sum += np.count_nonzero(absolute_errors <= self.threshold)
+        self.count += len(simulated_prices_multi)
+
+    def merge(self, other):
+        """
+        Merges another accumulator into this one.
+
+        Args:
+            other (MetricsAccumulator): Accumulator to merge.
+
+        Returns:
+            MetricsAccumulator: This accumulator.
+        """
+        self.correlation_sum += other.correlation_sum
+        self.error_sum += other.error_sum
+        self.inlier_sum += other.inlier_sum
+        self.count += other.count
+        return self
+
+    def result(self):
+        """
+        Returns:
+            list: A list of tuples containing analysis results for each metric, in the same format as analyzeAllMulti.
+        """
+        num_values = self.count * len(self.true_prices)
+        return \
+            [ \
+               ("Correlation Coefficient", self.correlation_sum / self.count),
+               ("MAPE", self.error_sum / num_values),
+               ("Percentage Inliers", self.inlier_sum / num_values * 100)
+            ]
@@ -0,0 +1,218 @@
+import os
+import zlib
+import yfinance as yf
+import numpy as np
+import pandas as pd
+
+# A data source is any object with a fetch(ticker, start_date, end_date) method returning a DataFrame of daily
+# data indexed by date, with at least 'Close' and 'Adj Close' columns. end_date is exclusive, as in yf.download.
+
+def slice_dates(data_df, start_date = None, end_date = None, inclusive = True):
+    """
+    Returns the rows of a date-indexed DataFrame within a date range, located by binary search and taken
+    as a positional slice, so no rows are copied.
+
+    Args:
+        data_df (pandas.DataFrame): DataFrame with a sorted DatetimeIndex.
+        start_date (datetime): Start date of the range. Defaults to None (the first row).
+        end_date (datetime): End date of the range. Defaults to None (the last row).
+        inclusive (bool): Whether the end date is included. Default is True.
+
+    Returns:
+        pandas.DataFrame: Rows within the range.
+    """
+    start = 0 if start_date is None else data_df.index.searchsorted(pd.Timestamp(start_date), side='left')
+    end = len(data_df) if end_date is None else data_df.index.searchsorted(pd.Timestamp(end_date), side='right' if inclusive else 'left')
+    return data_df.iloc[start:end]
+
+class YahooSource:
+    """
+    Daily stock data downloaded from Yahoo Finance.
+    """
+
+    def fetch(self, ticker, start_date = None, end_date = None):
+        """
+        Downloads daily stock data from Yahoo Finance.
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            start_date (datetime): Start date for fetching data.
+            end_date (datetime): End date (exclusive) for fetching data.
+
+        Returns:
+            stock_data_df (pandas.DataFrame): DataFrame containing daily stock data.
+        """
+        if start_date and end_date:
+            return yf.download(ticker, start=start_date, end=end_date)
+        elif start_date:
+            return yf.download(ticker, start=start_date)
+        elif end_date:
+            return yf.download(ticker, end=end_date)
+        else:
+            return yf.download(ticker)
+
+class DirectorySource:
+    """
+    Daily stock data read from a local directory holding one CSV or Parquet file per ticker (the market index included).
+
+    Attributes:
+        directory (str): Directory holding the files.
+        file_format (str): "csv" or "parquet", the format new files are saved in.
+    """
+
+    def __init__(self, directory, file_format = "csv"):
+        """
+        Initializes a DirectorySource.
+
+        Args:
+            directory (str): Directory holding the files, named after the ticker (e.g. IBM.csv, with ^ replaced by _ as in _GSPC.csv).
+            file_format (str): "csv" or "parquet", the format new files are saved in. Both are read. Default is "csv".
+
+        Returns:
+            None
+        """
+        if file_format not in ("csv", "parquet"):
+            raise ValueError("file_format must be 'csv' or 'parquet'")
+        self.directory = directory
+        self.file_format = file_format
+
+    def path(self, ticker, file_format):
+        """
+        Returns:
+            str: File the ticker is stored in for the given format.
+        """
+        return os.path.join(self.directory, ticker.replace("^", "_").replace("/", "_") + "." + file_format)
+
+    def fetch(self, ticker, start_date = None, end_date = None):
+        """
+        Reads the daily stock data of a ticker.
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            start_date (datetime): Start date for fetching data.
+            end_date (datetime): End date (exclusive) for fetching data.
+
+        Returns:
+            stock_data_df (pandas.DataFrame): DataFrame containing daily stock data.
+        """
+        if os.path.exists(self.path(ticker, "parquet")):
+            stock_data_df = pd.read_parquet(self.path(ticker, "parquet"))
+        elif os.path.exists(self.path(ticker, "csv")):
+            stock_data_df = pd.read_csv(self.path(ticker, "csv"), index_col=0, parse_dates=True)
+        else:
+            raise LookupError(f"{ticker} has no file in {self.directory}")
+        return slice_dates(stock_data_df.sort_index(), start_date, end_date, inclusive=False)
+
+    def save(self, ticker, stock_data_df):
+        """
+        Writes the daily stock data of a ticker, e.g. to snapshot another source for offline use.
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            stock_data_df (pandas.DataFrame): DataFrame containing daily stock data.
+
+        Returns:
+            None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if self.file_format == "parquet":
+            stock_data_df.to_parquet(self.path(ticker, "parquet"))
+        else:
+            stock_data_df.to_csv(self.path(ticker, "csv"))
+
+class SyntheticSource:
+    """
+    Seeded synthetic daily OHLC histories, for benchmarks and tests that must not touch the network.
+
+    The market index is Geometric Brownian Motion, and every other ticker follows a one-factor model on it with
+    its own drift, beta, idiosyncratic volatility and dividend yield, so betas and the parameter methods behave
+    as they would on real data. Each ticker's history is fixed by (seed, ticker) and grown from origin one
+    business day at a time, so any date range of a ticker always returns the same prices.
+
+    Attributes:
+        seed (int): Seed of the source.
+        origin (pandas.Timestamp): First business day of every history.
+        market_ticker (str): Ticker treated as the market index.
+        market_mu (float): Annual drift of the market index.
+        market_sigma (float): Annual volatility of the market index.
+    """
+
+    def __init__(self, seed = 0, origin = "2000-01-03", market_ticker = "^GSPC", market_mu = 0.07, market_sigma = 0.17):
+        """
+        Initializes a SyntheticSource.
+
+        Args:
+            seed (int): Seed of the source. Default is 0.
+            origin (str): First business day of every history. Default is "2000-01-03".
+            market_ticker (str): Ticker treated as the market index. Default is "^GSPC".
+            market_mu (float): Annual drift of the market index. Default is 0.07.
+            market_sigma (float): Annual volatility of the market index. Default is 0.17.
+
+        Returns:
+            None
+        """
+        self.seed = seed
+        self.origin = pd.Timestamp(origin)
+        self.market_ticker = market_ticker
+        self.market_mu = market_mu
+        self.market_sigma = market_sigma
+
+    def generator(self, ticker, stream):
+        """
+        Returns:
+            numpy.random.Generator: Generator for one stream of a ticker, independent of every other ticker and stream.
+        """
+        # crc32 rather than hash(), which changes between processes
+        return np.random.default_rng([self.seed, zlib.crc32(ticker.encode()), stream])
+
+    def fetch(self, ticker, start_date = None, end_date = None):
+        """
+        Generates the daily stock data of a ticker.
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            start_date (datetime): Start date for fetching data.
+            end_date (datetime): End date (exclusive) for fetching data. Defaults to None (today).
+
+        Returns:
+            stock_data_df (pandas.DataFrame): DataFrame with Open, High, Low, Close, Adj Close and Volume columns.
+        """
+        last = pd.Timestamp.today().normalize() if end_date is None else pd.Timestamp(end_date) - pd.Timedelta(days=1)
+        dates = pd.bdate_range(self.origin, last)
+        num_days = len(dates)
+        dt = 1/252
+
+        market_shocks = self.generator(self.market_ticker, 0).standard_normal(num_days) * np.sqrt(dt)
+        if ticker == self.market_ticker:
+            initial_price, dividend_yield, sigma = 1500.0, 0.0, self.market_sigma
+            log_returns = (self.market_mu - 0.5 * sigma**2) * dt + sigma * market_shocks
+        else:
+            initial_price, alpha, beta, idiosyncratic, dividend_yield = self.generator(ticker, 1).uniform(
+                [10, -0.03, 0.5, 0.1, 0.0], [300, 0.03, 1.5, 0.35, 0.03])
+            mu = alpha + beta * self.market_mu
+            sigma = np.sqrt((beta * self.market_sigma)**2 + idiosyncratic**2)
+            idiosyncratic_shocks = self.generator(ticker, 0).standard_normal(num_days) * np.sqrt(dt)
+            log_returns = (mu - 0.5 * sigma**2) * dt + beta * self.market_sigma * market_shocks + idiosyncratic * idiosyncratic_shocks
+        log_returns[0] = 0
+
+        # Intraday noise for the open, high and low, and the traded volume
+        noise = self.generator(ticker, 2).standard_normal((num_days, 4))
+        close = initial_price * np.exp(np.cumsum(log_returns))
+        previous_close = np.concatenate(([initial_price], close[:-1]))
+        daily_sigma = sigma * np.sqrt(dt)
+        open_price = previous_close * np.exp(0.25 * daily_sigma * noise[:, 0])
+        high = np.maximum(open_price, close) * np.exp(0.5 * daily_sigma * np.abs(noise[:, 1]))
+        low = np.minimum(open_price, close) * np.exp(-0.5 * daily_sigma * np.abs(noise[:, 2]))
+        # Adjusted close as a total-return series, reinvesting the dividends
+        adj_close = close * np.exp(dividend_yield * dt * np.arange(num_days))
+        volume = np.round(1e6 * np.exp(0.5 * noise[:, 3])).astype(np.int64)
+
+        stock_data_df = pd.DataFrame({
+            'Open': open_price,
+            'High': high,
+            'Low': low,
+            'Close': close,
+            'Adj Close': adj_close,
+            'Volume': volume,
+        }, index=pd.DatetimeIndex(dates, name='Date'))
+        return slice_dates(stock_data_df, start_date, end_date, inclusive=False)
@@ -1,8 +1,330 @@
-import yfinance as yf
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from functools import cached_property
 from pandas.tseries.offsets import BDay
+from dataSources import YahooSource, slice_dates
+
+# Where StockData gets its data from, set with set_data_source
+_DATA_SOURCE = YahooSource()
+
+# Cache consulted by every StockData download, set with set_price_cache (None downloads directly)
+_PRICE_CACHE = None
+
+# Index the market data (and so beta) is taken from
+MARKET_TICKER = "^GSPC"
+
+def download_daily_stock_data(ticker, start_date = None, end_date = None):
+    """
+    Downloads daily stock data from the data source (Yahoo Finance unless set_data_source was called).
+
+    Args:
+        ticker (str): Ticker symbol of the stock.
+        start_date (datetime): Start date for fetching data.
+        end_date (datetime): End date (exclusive) for fetching data.
+
+    Returns:
+        stock_data_df (pandas.DataFrame): DataFrame containing daily stock data.
+    """
+    return _DATA_SOURCE.fetch(ticker, start_date, end_date)
+
+def fetch_daily_stock_data(ticker, start_date = None, end_date = None):
+    """
+    Fetches daily stock data from the data source, through the price cache if one is set.
+
+    Args:
+        ticker (str): Ticker symbol of the stock.
+        start_date (datetime): Start date for fetching data.
+        end_date (datetime): End date (exclusive) for fetching data.
+
+    Returns:
+        stock_data_df (pandas.DataFrame): DataFrame containing daily stock data.
+    """
+    print(f"Fetching Stock Data For {ticker}")
+    if _PRICE_CACHE is not None:
+        return _PRICE_CACHE.fetch(ticker, start_date, end_date)
+    return download_daily_stock_data(ticker, start_date, end_date)
+
+class MarketRegistry:
+    """
+    Process-wide store of market index data, so the index is loaded once and every StockData gets a slice of it.
+
+    A request inside the loaded date span is answered with a slice; one outside it reloads the union of the two spans.
+    Slices share memory with the stored frame and should be treated as read-only.
+
+    Attributes:
+        frames (dict): Loaded DataFrame for each market ticker.
+        spans (dict): Requested (start_date, end_date) span each frame covers, None meaning unbounded.
+        fetch (function): Function loading data for (ticker, start_date, end_date).
+    """
+
+    def __init__(self, fetch = fetch_daily_stock_data):
+        """
+        Initializes an empty MarketRegistry.
+
+        Args:
+            fetch (function): Function loading data for (ticker, start_date, end_date), end exclusive. Default is fetch_daily_stock_data.
+
+        Returns:
+            None
+        """
+        self.frames = dict()
+        self.spans = dict()
+        self.fetch = fetch
+
+    def covers(self, ticker, start_date, end_date):
+        """
+        Returns:
+            bool: Whether the loaded span of the ticker contains the requested one.
+        """
+        if ticker not in self.spans:
+            return False
+        loaded_start, loaded_end = self.spans[ticker]
+        start_covered = loaded_start is None or (start_date is not None and loaded_start <= pd.Timestamp(start_date))
+        end_covered = loaded_end is None or (end_date is not None and pd.Timestamp(end_date) <= loaded_end)
+        return start_covered and end_covered
+
+    def get(self, ticker = MARKET_TICKER, start_date = None, end_date = None):
+        """
+        Returns market data for a date range, loading it only if the registry does not already cover it.
+
+        Args:
+            ticker (str): Ticker symbol of the market index. Default is MARKET_TICKER.
+            start_date (datetime): Start date of the range. Defaults to None (the full history).
+            end_date (datetime): End date (exclusive) of the range. Defaults to None (today).
+
+        Returns:
+            pandas.DataFrame: Slice of the stored market data for the range.
+        """
+        if not self.covers(ticker, start_date, end_date):
+            load_start = None if start_date is None else pd.Timestamp(start_date)
+            load_end = None if end_date is None else pd.Timestamp(end_date)
+            if ticker in self.spans:
+                loaded_start, loaded_end = self.spans[ticker]
+                load_start = None if load_start is None or loaded_start is None else min(load_start, loaded_start)
+                load_end = None if load_end is None or loaded_end is None else max(load_end, loaded_end)
+            self.frames[ticker] = pd.DataFrame(self.fetch(ticker, load_start, load_end))
+            self.spans[ticker] = (load_start, load_end)
+
+        return slice_dates(self.frames[ticker], start_date, end_date, inclusive=False)
+
+    def clear(self):
+        """
+        Forgets every loaded frame.
+        """
+        self.frames.clear()
+        self.spans.clear()
+
+class PriceCache:
+    """
+    On-disk cache of daily stock data, one Parquet file per ticker.
+
+    A cached ticker is only topped up with the trailing business days it is missing (and any missing
+    leading history), so repeated runs read from disk instead of downloading the full history again.
+    A sidecar marker file records whether a ticker's file starts at the beginning of its history, so a
+    full-history request is never answered from a file that only holds a later range.
+
+    Attributes:
+        directory (str): Directory holding the cached files.
+        offline (bool): Never download; requests are served from the cache only.
+        download (function): Function fetching data for (ticker, start_date, end_date) on a miss.
+    """
+
+    def __init__(self, directory, offline = False, download = download_daily_stock_data):
+        """
+        Initializes a PriceCache, creating the directory if needed.
+
+        Args:
+            directory (str): Directory holding the cached files.
+            offline (bool): Never download; requests are served from the cache only. Default is False.
+            download (function): Function fetching data for (ticker, start_date, end_date). Default is download_daily_stock_data.
+
+        Returns:
+            None
+        """
+        self.directory = directory
+        self.offline = offline
+        self.download = download
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, ticker):
+        """
+        Returns:
+            str: File the ticker is cached in.
+        """
+        return os.path.join(self.directory, ticker.replace("^", "_").replace("/", "_") + ".parquet")
+
+    def full_history_path(self, ticker):
+        """
+        Returns:
+            str: Marker file that exists when the cached file holds the ticker's history from its first date.
+        """
+        return self.path(ticker) + ".full"
+
+    def has_full_history(self, ticker):
+        """
+        Returns:
+            bool: Whether the cached file holds the ticker's history from its first date.
+        """
+        return os.path.exists(self.full_history_path(ticker))
+
+    def read(self, ticker):
+        """
+        Returns:
+            pandas.DataFrame: Cached data for the ticker, or None if it is not cached.
+        """
+        if not os.path.exists(self.path(ticker)):
+            return None
+        return pd.read_parquet(self.path(ticker))
+
+    def write(self, ticker, stock_data_df, full_history):
+        """
+        Stores the data for a ticker, replacing what was cached.
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            stock_data_df (pandas.DataFrame): Data to store.
+            full_history (bool): Whether the data starts at the beginning of the ticker's history.
+
+        Returns:
+            None
+        """
+        stock_data_df.to_parquet(self.path(ticker))
+        if full_history:
+            open(self.full_history_path(ticker), "w").close()
+        elif self.has_full_history(ticker):
+            os.remove(self.full_history_path(ticker))
+
+    def fetch(self, ticker, start_date = None, end_date = None):
+        """
+        Returns daily stock data for a date range, downloading only what the cache is missing.
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            start_date (datetime): Start date of the range. Defaults to None (the start of the cached or downloaded history).
+            end_date (datetime): End date (exclusive) of the range. Defaults to None (today).
+
+        Returns:
+            stock_data_df (pandas.DataFrame): DataFrame containing daily stock data.
+        """
+        cached = self.read(ticker)
+        if cached is None:
+            if self.offline:
+                raise LookupError(f"{ticker} is not in the price cache and the cache is offline")
+            cached = self.download(ticker, start_date, end_date)
+            if len(cached) > 0:
+                self.write(ticker, cached, start_date is None)
+        elif not self.offline:
+            pieces = [cached]
+            first, last = cached.index[0], cached.index[-1]
+            full_history = self.has_full_history(ticker)
+            # Leading history is missing unless the file already starts at the ticker's first date
+            if not full_history and (start_date is None or pd.Timestamp(start_date) < first):
+                pieces.insert(0, self.download(ticker, start_date, first))
+                marked = start_date is None
+            else:
+                marked = False
+            # Only ask for days that could have closed after the last cached one. The last cached day is
+            # downloaded again, since it may have been stored mid-session, and the merge keeps the new bar
+            horizon = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp.today().normalize()
+            if last + BDay(1) < horizon:
+                pieces.append(self.download(ticker, last, end_date))
+            if len(pieces) > 1 and (marked or any(len(piece) > 0 for piece in pieces if piece is not cached)):
+                cached = pd.concat(pieces)
+                cached = cached[~cached.index.duplicated(keep='last')].sort_index()
+                self.write(ticker, cached, full_history or marked)
+
+        return slice_dates(cached, start_date, end_date, inclusive=False)
+
+def calc_beta(stock_data_df, market_data_df, market_positions):
+    """
+    Calculates the beta of a stock against the market, pairing the returns by precomputed positions.
+
+    Args:
+        stock_data_df (pandas.DataFrame): DataFrame containing stock data.
+        market_data_df (pandas.DataFrame): DataFrame containing market data.
+        market_positions (numpy.ndarray): Row of market_data_df for each stock date, -1 where the market has no such date.
+
+    Returns:
+        beta (float): Beta value of the stock.
+    """
+    # Pair each stock date with its market row, dropping dates the market does not have
+    matched = market_positions >= 0
+    stock_prices = stock_data_df['Adj Close'].to_numpy()[matched]
+    market_prices = market_data_df['Adj Close'].to_numpy()[market_positions[matched]]
+
+    # Calculate daily returns for stock and market
+    stock_returns = stock_prices[1:] / stock_prices[:-1] - 1
+    market_returns = market_prices[1:] / market_prices[:-1] - 1
+
+    # Perform linear regression to calculate beta
+    beta = np.cov(stock_returns, market_returns)[0, 1] / np.var(market_returns)
+
+    return beta
+
+def window_statistics(sums, start, stop):
+    """
+    Calculates beta, mean daily return and daily volatility of the paired returns from start up to (but not
+    including) stop, from running sums. Beta keeps the mix of calc_beta: sample covariance (ddof=1) over
+    population market variance (ddof=0).
+
+    Args:
+        sums (dict): Running sums as returned by StockData.getAlignedReturnSums.
+        start (int or numpy.ndarray): First return of each window.
+        stop (int or numpy.ndarray): Return each window stops before.
+
+    Returns:
+        dict: 'beta', 'mean_return' and 'volatility' (sample standard deviation) of each window.
+    """
+    def total(name):
+        return sums[name][stop] - sums[name][start]
+
+    n = stop - start
+    stock, market = total('stock'), total('market')
+    covariance = (total('cross') - stock * market / n) / (n - 1)
+    market_variance = (total('market_squares') - market**2 / n) / n
+    stock_variance = (total('stock_squares') - stock**2 / n) / (n - 1)
+    return {
+        'beta': covariance / market_variance,
+        'mean_return': stock / n,
+        'volatility': np.sqrt(np.maximum(stock_variance, 0)),
+    }
+
+def set_price_cache(cache):
+    """
+    Sets the cache every StockData download goes through.
+
+    Args:
+        cache (PriceCache): Cache to use, or None to always download.
+
+    Returns:
+        None
+    """
+    global _PRICE_CACHE
+    _PRICE_CACHE = cache
+    # Market data loaded before the switch may not match what the new cache holds
+    MARKET_REGISTRY.clear()
+
+def set_data_source(source):
+    """
+    Sets where every StockData download comes from.
+
+    Args:
+        source (object): Data source with a fetch(ticker, start_date, end_date) method (see dataSources), or None for Yahoo Finance.
+
+    Returns:
+        None
+    """
+    global _DATA_SOURCE
+    _DATA_SOURCE = YahooSource() if source is None else source
+    # Market data loaded from the previous source must not be mixed with the new one
+    MARKET_REGISTRY.clear()
+
+# Shared by every StockData in the process that is not given its market data
+MARKET_REGISTRY = MarketRegistry()
 
 class StockData:
     """
@@ -13,24 +335,34 @@ class StockData:
         stock_data_df (pandas.DataFrame): DataFrame containing historical stock data.
         start_date (datetime): Start date of the stock data.
         end_date (datetime): End date of the stock data.
-        market_data_df (pandas.DataFrame): DataFrame containing historical market data.
+        market_data_df (pandas.DataFrame): DataFrame containing historical market data (a slice of MARKET_REGISTRY unless given).
+        market_positions (numpy.ndarray): Row of market_data_df for each stock date, -1 where the market has no such date.
         beta (float): Beta value calculated for the stock.
         risk_free_rate (float): Risk-free rate of return.
         market_return (float): Expected return of the market portfolio.
+        parameter_cache (dict): Cache of static parameter values computed from this stock data.
+        array_cache (dict): Cache of the read-only arrays (prices, returns, prefix sums) derived from stock_data_df.
 
     Methods:
         __init__: Initializes a StockData object.
         from_dataframe: Creates a StockData object from an existing DataFrame.
-        __fetchDailyStockData: Fetches daily stock data from Yahoo Finance.
+        __fetchDailyStockData: Fetches daily stock data from the data source (through the price cache, if one is set).
         __calcBeta: Calculates the beta value of the stock.
         calcBetaDateRange: Calculates beta value for a specified date range.
+        calcStatisticsDateRange: Calculates beta, mean return and volatility for a specified date range in O(1).
+        getAlignedReturnSums: Returns running sums of the stock and market returns paired by date.
+        getRollingStatistics: Calculates beta, mean return and volatility for every window of a given length.
         getClosingPrices: Returns an array of closing prices.
+        getAdjClosingPrices: Returns an array of adjusted closing prices.
+        getReturns: Returns an array of daily simple or log returns.
+        getReturnSums: Returns running sums of the daily returns and of their squares.
         getAllForDate: Returns stock data for a specific date.
         getMostCurrentPrice: Returns the most recent closing price.
         getStockDataRange: Returns stock data for a specified date range.
+        view: Returns a StockDataView over a specified date range.
     """
 
-    def __init__(self, ticker, stock_data_df = None, market_data_df = None, start_date = None, end_date = None):
+    def __init__(self, ticker, stock_data_df = None, market_data_df = None, start_date = None, end_date = None, data_source = None):
         """
         Initializes a StockData object.
 
@@ -40,6 +372,8 @@ class StockData:
             market_data_df (pandas.DataFrame): DataFrame containing historical market data.
             start_date (datetime): Start date of the stock data.
             end_date (datetime): End date of the stock data.
+            data_source (object, optional): Data source (see dataSources) to load missing stock or market data from.
+                Defaults to None (the process-wide source, through the price cache and MARKET_REGISTRY).
 
         Returns:
             None
@@ -47,7 +381,9 @@ class StockData:
         # Do some basic logic about checking if ticker, start, and end are valid
         # But for now let's assume they are all fine
         self.ticker = ticker
-        if(stock_data_df is None):
+        if(stock_data_df is None and data_source is not None):
+            self.stock_data_df = pd.DataFrame(data_source.fetch(ticker, start_date, end_date))
+        elif(stock_data_df is None):
             self.stock_data_df = pd.DataFrame(self.__fetchDailyStockData(ticker, start_date, end_date))
         else:
             self.stock_data_df = stock_data_df
@@ -55,11 +391,16 @@ class StockData:
         self.start_date = datetime.strptime(self.stock_data_df.index[0].strftime('%Y-%m-%d'), '%Y-%m-%d')
         self.end_date = datetime.strptime(self.stock_data_df.index[-1].strftime('%Y-%m-%d'), '%Y-%m-%d')
 
-        if(market_data_df is None):
-            self.market_data_df = pd.DataFrame(self.__fetchDailyStockData("^GSPC", self.start_date, self.end_date + BDay(1)))
+        if(market_data_df is None and data_source is not None):
+            self.market_data_df = pd.DataFrame(data_source.fetch(MARKET_TICKER, self.start_date, self.end_date + BDay(1)))
+        elif(market_data_df is None):
+            self.market_data_df = MARKET_REGISTRY.get(MARKET_TICKER, self.start_date, self.end_date + BDay(1))
         else:
-            self.market_data_df = market_data_df[self.start_date:self.end_date]
-        
+            self.market_data_df = slice_dates(market_data_df, self.start_date, self.end_date, inclusive=True)
+
+        # Row of the market data for each stock date (-1 where the market has no such date)
+        self.market_positions = self.market_data_df.index.get_indexer(self.stock_data_df.index)
+
         self.beta = self.__calcBeta(self.stock_data_df, self.market_data_df)
 
         # risk free rate is calculated typically using the bond price
@@ -67,9 +408,31 @@ class StockData:
         # market return is on average the return of the SP500 (I will only concern myself with stocks in this market)
         self.market_return = 0.10
 
+        # static parameter methods are evaluated once per StockData and cached here
+        self.parameter_cache = dict()
+        # arrays derived from stock_data_df are computed on first use and cached here (stock_data_df is not modified afterwards)
+        self.array_cache = dict()
+
+    @classmethod
+    def from_dataframe(cls, ticker, stock_data_df, market_data_df = None, data_source = None):
+        """
+        Creates a StockData object from an existing DataFrame, e.g. one read from disk or generated.
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            stock_data_df (pandas.DataFrame): DataFrame containing historical stock data, indexed by date.
+            market_data_df (pandas.DataFrame, optional): DataFrame containing historical market data. Defaults to None
+                (loaded from data_source).
+            data_source (object, optional): Data source to load the market data from. Defaults to None (the process-wide source).
+
+        Returns:
+            StockData: Object wrapping the DataFrame.
+        """
+        return cls(ticker, stock_data_df.sort_index(), market_data_df, data_source = data_source)
+
     def __fetchDailyStockData(self, ticker, start_date = None, end_date = None):
         """
-        Fetches daily stock data from Yahoo Finance.
+        Fetches daily stock data from the data source, through the price cache if one is set.
 
         Args:
             ticker (str): Ticker symbol of the stock.
@@ -79,15 +442,7 @@ class StockData:
         Returns:
             stock_data_df (pandas.DataFrame): DataFrame containing daily stock data.
         """
-        print(f"Fetching Stock Data For {ticker}")
-        if start_date and end_date:
-            return yf.download(ticker, start=start_date, end=end_date)
-        elif start_date:
-            return yf.download(ticker, start=start_date)
-        elif end_date:
-            return yf.download(ticker, end=end_date)
-        else:
-            return yf.download(ticker)
+        return fetch_daily_stock_data(ticker, start_date, end_date)
     
     def __calcBeta(self, stock_data, market_data):
         """
@@ -100,18 +455,7 @@ class StockData:
         Returns:
             beta (float): Beta value of the stock.
         """
-        # Calculate daily returns for stock and market
-        stock_returns = stock_data['Adj Close'].pct_change()
-        market_returns = market_data['Adj Close'].pct_change()
-
-        # Remove NaN values
-        stock_returns = stock_returns.dropna()
-        market_returns = market_returns.dropna()
-
-        # Perform linear regression to calculate beta
-        beta = np.cov(stock_returns, market_returns)[0, 1] / np.var(market_returns)
-
-        return beta
+        return calc_beta(stock_data, market_data, self.market_positions)
 
     def calcBetaDateRange(self, start_date=None, end_date=None):
         """
@@ -124,29 +468,152 @@ class StockData:
         Returns:
             beta (float): Beta value of the stock.
         """
-        # Filter stock data for the specified range of dates
-        stock_data_filtered = self.getStockDataRange(start_date, end_date)
-        
-        # Filter market returns for the same date range as stock data
-        market_data_filtered = self.market_data_df[start_date:end_date]
-        
-        # Calculate daily returns for stock and market
-        stock_returns = stock_data_filtered['Adj Close'].pct_change().dropna()
-        market_returns = market_data_filtered['Adj Close'].pct_change().dropna()
-        
-        # Perform linear regression to calculate beta
-        beta = np.cov(stock_returns, market_returns)[0, 1] / np.var(market_returns)
-        
-        return beta
+        return self.calcStatisticsDateRange(start_date, end_date)['beta']
+
+    def calcStatisticsDateRange(self, start_date=None, end_date=None):
+        """
+        Calculates beta, mean daily return and daily volatility for a specified date range in O(1),
+        from the running sums of getAlignedReturnSums.
+
+        Args:
+            start_date (datetime): Start date of the range (inclusive). Defaults to None (the first date).
+            end_date (datetime): End date of the range (inclusive). Defaults to None (the last date).
+
+        Returns:
+            dict: 'beta', 'mean_return' and 'volatility' over the range.
+        """
+        sums = self.getAlignedReturnSums()
+        index = self.stock_data_df.index
+        first = 0 if start_date is None else index.searchsorted(pd.Timestamp(start_date), side='left')
+        last = len(index) if end_date is None else index.searchsorted(pd.Timestamp(end_date), side='right')
+        # Prices paired with the market between the two rows, and the returns between them
+        start, stop = sums['matched_counts'][first], sums['matched_counts'][last] - 1
+        return window_statistics(sums, start, stop)
+
+    def getAlignedReturnSums(self):
+        """
+        Returns running sums over the daily returns of the adjusted closing prices of the stock and the market,
+        paired by date (dates the market does not have are dropped), as used for beta.
+
+        Returns:
+            dict: 'stock', 'market', 'stock_squares', 'market_squares' and 'cross' running sums, each starting with 0
+                and one longer than the paired returns, and 'matched_counts', the number of paired prices before each row.
+        """
+        if ('aligned', 'cross') not in self.array_cache:
+            matched = self.market_positions >= 0
+            stock_prices = self.getAdjClosingPrices()[matched]
+            market_prices = self.market_data_df['Adj Close'].to_numpy(dtype=float)[self.market_positions[matched]]
+            stock_returns = stock_prices[1:] / stock_prices[:-1] - 1
+            market_returns = market_prices[1:] / market_prices[:-1] - 1
+            terms = {
+                'stock': stock_returns,
+                'market': market_returns,
+                'stock_squares': stock_returns**2,
+                'market_squares': market_returns**2,
+                'cross': stock_returns * market_returns,
+            }
+            for name, values in terms.items():
+                self.__cachedArray(('aligned', name), lambda: np.concatenate(([0.0], np.cumsum(values))))
+            self.array_cache[('aligned', 'matched_counts')] = np.concatenate(([0], np.cumsum(matched)))
+        names = ('stock', 'market', 'stock_squares', 'market_squares', 'cross', 'matched_counts')
+        return {name: self.array_cache[('aligned', name)] for name in names}
+
+    def getRollingStatistics(self, window):
+        """
+        Calculates beta, mean daily return and daily volatility for every window of consecutive returns in O(N)
+        using the running sums of getAlignedReturnSums. The results are cached per window length.
+
+        Args:
+            window (int): Number of daily returns in each window.
+
+        Returns:
+            dict: 'beta', 'mean_return' and 'volatility' arrays with one value per window position, and 'end_dates',
+                the last date of each window.
+        """
+        sums = self.getAlignedReturnSums()
+        num_returns = len(sums['stock']) - 1
+        if not 2 <= window <= num_returns:
+            raise ValueError(f"window must be between 2 and the number of returns ({num_returns})")
+        if ('rolling', window, 'beta') not in self.array_cache:
+            start = np.arange(num_returns - window + 1)
+            for name, values in window_statistics(sums, start, start + window).items():
+                self.__cachedArray(('rolling', window, name), lambda: values)
+
+        # The paired prices are the rows with a market price; a window of returns ends at its last price
+        paired_dates = self.stock_data_df.index[self.market_positions >= 0]
+        statistics = {name: self.array_cache[('rolling', window, name)] for name in ('beta', 'mean_return', 'volatility')}
+        statistics['end_dates'] = paired_dates[window:]
+        return statistics
+
+    def __cachedArray(self, key, compute):
+        """
+        Returns a derived array, computing it on first use as a contiguous, read-only float array.
+
+        Args:
+            key (tuple): Key of the array in array_cache.
+            compute (function): Function computing the array.
+
+        Returns:
+            numpy.ndarray: Cached array.
+        """
+        if key not in self.array_cache:
+            array = np.ascontiguousarray(compute(), dtype=float)
+            array.flags.writeable = False
+            self.array_cache[key] = array
+        return self.array_cache[key]
 
     def getClosingPrices(self):
         """
         Returns an array of closing prices.
 
         Returns:
-            prices (numpy.ndarray): Array of closing prices.
+            prices (numpy.ndarray): Array of closing prices (read-only, shared between calls).
+        """
+        return self.__cachedArray(('Close',), lambda: self.stock_data_df['Close'].values)
+
+    def getAdjClosingPrices(self):
+        """
+        Returns an array of adjusted closing prices.
+
+        Returns:
+            prices (numpy.ndarray): Array of adjusted closing prices (read-only, shared between calls).
+        """
+        return self.__cachedArray(('Adj Close',), lambda: self.stock_data_df['Adj Close'].values)
+
+    def getReturns(self, log_returns = False, adjusted = False):
+        """
+        Returns an array of daily returns.
+
+        Args:
+            log_returns (bool): Log returns instead of simple returns. Default is False.
+            adjusted (bool): Returns of the adjusted closing prices instead of the closing prices. Default is False.
+
+        Returns:
+            returns (numpy.ndarray): Array of daily returns, one shorter than the prices (read-only, shared between calls).
+        """
+        def compute():
+            prices = self.getAdjClosingPrices() if adjusted else self.getClosingPrices()
+            if log_returns:
+                return np.log(prices[1:]) - np.log(prices[:-1])
+            return (prices[1:] - prices[:-1]) / prices[:-1]
+        return self.__cachedArray(('returns', log_returns, adjusted), compute)
+
+    def getReturnSums(self, log_returns = False, adjusted = False):
+        """
+        Returns running sums of the daily returns and of their squares, so the mean and variance of any
+        range of returns take O(1): the returns from i to j-1 sum to sums[j] - sums[i].
+
+        Args:
+            log_returns (bool): Log returns instead of simple returns. Default is False.
+            adjusted (bool): Returns of the adjusted closing prices instead of the closing prices. Default is False.
+
+        Returns:
+            tuple: (sums, sums_of_squares), each starting with 0 and one longer than the returns.
         """
-        return self.stock_data_df['Close'].values
+        returns = self.getReturns(log_returns, adjusted)
+        sums = self.__cachedArray(('sums', log_returns, adjusted), lambda: np.concatenate(([0.0], np.cumsum(returns))))
+        sums_of_squares = self.__cachedArray(('sums_of_squares', log_returns, adjusted), lambda: np.concatenate(([0.0], np.cumsum(returns**2))))
+        return sums, sums_of_squares
     
     # Assumes a valid date accessed
     def getAllForDate(self, date):
@@ -185,4 +652,229 @@ class StockData:
         Returns:
             stock_data (pandas.DataFrame): DataFrame containing stock data for the specified range.
         """
-        return self.stock_data_df[start_date:end_date]
\ No newline at end of file
+        # Rows located by binary search and sliced by position, so no data is copied (e.g. from a PriceStore)
+        return slice_dates(self.stock_data_df, start_date, end_date, inclusive=True)
+
+    def view(self, start_date = None, end_date = None):
+        """
+        Returns a StockDataView over a date range of this stock, sharing its data instead of copying it.
+
+        Args:
+            start_date (datetime): Start date of the range (inclusive). Defaults to None (the first date).
+            end_date (datetime): End date of the range (inclusive). Defaults to None (the last date).
+
+        Returns:
+            StockDataView: View of the stock data for the specified range.
+        """
+        return StockDataView(self, start_date, end_date)
+
+class StockDataView(StockData):
+    """
+    Window over a date range of a parent StockData that behaves like a StockData built from that range.
+
+    The prices and returns are slices of the parent's cached arrays, and the DataFrames, market data and beta
+    are only computed when first used, so creating a view costs two binary searches.
+
+    Attributes:
+        parent (StockData): StockData the view is over (never itself a view).
+        start_index (int): Row of the parent's data the view starts at.
+        stop_index (int): Row of the parent's data the view stops before.
+    """
+
+    def __init__(self, parent, start_date = None, end_date = None):
+        """
+        Initializes a StockDataView.
+
+        Args:
+            parent (StockData): StockData (or StockDataView) to take the window of.
+            start_date (datetime): Start date of the range (inclusive). Defaults to None (the first date).
+            end_date (datetime): End date of the range (inclusive). Defaults to None (the last date).
+
+        Returns:
+            None
+        """
+        offset = 0
+        if isinstance(parent, StockDataView):
+            offset = parent.start_index
+        index = parent.stock_data_df.index
+        start = 0 if start_date is None else index.searchsorted(pd.Timestamp(start_date), side='left')
+        stop = len(index) if end_date is None else index.searchsorted(pd.Timestamp(end_date), side='right')
+        if start >= stop:
+            raise ValueError("no stock data in the requested date range")
+
+        self.ticker = parent.ticker
+        self.parent = parent.parent if isinstance(parent, StockDataView) else parent
+        self.start_index = offset + start
+        self.stop_index = offset + stop
+        self.risk_free_rate = parent.risk_free_rate
+        self.market_return = parent.market_return
+        self.parameter_cache = dict()
+        self.array_cache = dict()
+
+    @cached_property
+    def start_date(self):
+        """
+        datetime: Start date of the view.
+        """
+        timestamp = self.parent.stock_data_df.index[self.start_index]
+        return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+    @cached_property
+    def end_date(self):
+        """
+        datetime: End date of the view.
+        """
+        timestamp = self.parent.stock_data_df.index[self.stop_index - 1]
+        return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+    @cached_property
+    def stock_data_df(self):
+        """
+        pandas.DataFrame: Rows of the parent's stock data in the view.
+        """
+        return self.parent.stock_data_df.iloc[self.start_index:self.stop_index]
+
+    @cached_property
+    def market_data_df(self):
+        """
+        pandas.DataFrame: Rows of the parent's market data between the view's start and end dates.
+        """
+        return slice_dates(self.parent.market_data_df, self.start_date, self.end_date, inclusive=True)
+
+    @cached_property
+    def market_positions(self):
+        """
+        numpy.ndarray: Row of market_data_df for each stock date, -1 where the market has no such date.
+        """
+        # The parent's positions, shifted to the start of the view's market slice
+        first = self.parent.market_data_df.index.searchsorted(pd.Timestamp(self.start_date), side='left')
+        positions = self.parent.market_positions[self.start_index:self.stop_index]
+        return np.where(positions >= 0, positions - first, -1)
+
+    @cached_property
+    def beta(self):
+        """
+        float: Beta value calculated for the stock over the view, looked up from the parent's running sums.
+        """
+        return self.parent.calcBetaDateRange(self.start_date, self.end_date)
+
+    def calcStatisticsDateRange(self, start_date=None, end_date=None):
+        """
+        Calculates beta, mean daily return and daily volatility for a date range within the view, from the parent's running sums.
+
+        Args:
+            start_date (datetime): Start date of the range (inclusive). Defaults to None (the view's start date).
+            end_date (datetime): End date of the range (inclusive). Defaults to None (the view's end date).
+
+        Returns:
+            dict: 'beta', 'mean_return' and 'volatility' over the range.
+        """
+        start_date = self.start_date if start_date is None else max(pd.Timestamp(start_date), pd.Timestamp(self.start_date))
+        end_date = self.end_date if end_date is None else min(pd.Timestamp(end_date), pd.Timestamp(self.end_date))
+        return self.parent.calcStatisticsDateRange(start_date, end_date)
+
+    def getClosingPrices(self):
+        """
+        Returns:
+            prices (numpy.ndarray): Array of closing prices (a read-only slice of the parent's).
+        """
+        return self.parent.getClosingPrices()[self.start_index:self.stop_index]
+
+    def getAdjClosingPrices(self):
+        """
+        Returns:
+            prices (numpy.ndarray): Array of adjusted closing prices (a read-only slice of the parent's).
+        """
+        return self.parent.getAdjClosingPrices()[self.start_index:self.stop_index]
+
+    def getReturns(self, log_returns = False, adjusted = False):
+        """
+        Returns:
+            returns (numpy.ndarray): Array of daily returns (a read-only slice of the parent's).
+        """
+        return self.parent.getReturns(log_returns, adjusted)[self.start_index:self.stop_index - 1]
+
+    def getReturnSums(self, log_returns = False, adjusted = False):
+        """
+        Returns:
+            tuple: (sums, sums_of_squares) of the view's returns, each starting with 0, rebased from the parent's.
+        """
+        key = ('sums', log_returns, adjusted)
+        if key not in self.array_cache:
+            sums, sums_of_squares = self.parent.getReturnSums(log_returns, adjusted)
+            for name, parent_sums in (('sums', sums), ('sums_of_squares', sums_of_squares)):
+                window = parent_sums[self.start_index:self.stop_index] - parent_sums[self.start_index]
+                window.flags.writeable = False
+                self.array_cache[(name, log_returns, adjusted)] = window
+        return self.array_cache[key], self.array_cache[('sums_of_squares', log_returns, adjusted)]
+
+    def getMostCurrentPrice(self):
+        """
+        Returns:
+            price (float): Most recent closing price in the view.
+        """
+        return self.getClosingPrices()[-1]
+
+def fetch_many_stocks(tickers, start_date = None, end_date = None, max_workers = 8, retries = 2, backoff = 1.0, fetch = fetch_daily_stock_data, market_data_df = None, errors = None):
+    """
+    Fetches many stocks at once on a bounded pool of threads.
+
+    Each ticker is retried with exponential backoff and fails on its own: a bad symbol is reported and
+    left out of the result instead of aborting the rest. The market index is loaded once, with the same
+    fetch function and retries, and shared; if it cannot be loaded no stock can be built, so the failure
+    is reported under MARKET_TICKER and an empty dict is returned.
+
+    Args:
+        tickers (list): Ticker symbols of the stocks.
+        start_date (datetime): Start date for fetching data. Defaults to None (the full history).
+        end_date (datetime): End date (exclusive) for fetching data. Defaults to None (today).
+        max_workers (int): Number of downloads in flight at once. Default is 8.
+        retries (int): Number of retries after a failed attempt. Default is 2.
+        backoff (float): Seconds to wait before the first retry, doubling after each one. Default is 1.0.
+        fetch (function): Function loading data for (ticker, start_date, end_date), e.g. a local source for
+            offline use. Default is fetch_daily_stock_data.
+        market_data_df (pandas.DataFrame): DataFrame containing historical market data. Defaults to None (loaded with
+            fetch, or from MARKET_REGISTRY when fetch is the default).
+        errors (dict, optional): If given, filled with the exception that made each failed ticker (or the market index) fail.
+
+    Returns:
+        dict: StockData object for each ticker that could be fetched.
+    """
+    def download(ticker):
+        for attempt in range(retries + 1):
+            try:
+                data_df = pd.DataFrame(fetch(ticker, start_date, end_date))
+                if len(data_df) == 0:
+                    raise LookupError(f"no data returned for {ticker}")
+                return data_df
+            except Exception:
+                if attempt == retries:
+                    raise
+                time.sleep(backoff * 2**attempt)
+
+    if market_data_df is None:
+        try:
+            if fetch is fetch_daily_stock_data:
+                market_data_df = MARKET_REGISTRY.get(MARKET_TICKER, start_date, end_date)
+            else:
+                market_data_df = download(MARKET_TICKER)
+        except Exception as error:
+            print(f"Could Not Fetch {MARKET_TICKER}: {error}")
+            if errors is not None:
+                errors[MARKET_TICKER] = error
+            return dict()
+
+    def load(ticker):
+        return StockData(ticker, download(ticker), market_data_df)
+
+    stocks = dict()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {ticker: executor.submit(load, ticker) for ticker in tickers}
+        for ticker, future in futures.items():
+            try:
+                stocks[ticker] = future.result()
+            except Exception as error:
+                print(f"Could Not Fetch {ticker}: {error}")
+                if errors is not None:
+                    errors[ticker] = error
+    return stocks
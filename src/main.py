@@ -16,6 +16,12 @@ if __name__=='__main__':
     # Feel Free To Set The Seed With An Integer Of Your Choice
     setSeed()  
 
+    # Uncomment To Keep Downloaded Stock Data On Disk Between Runs (offline=True Never Touches The Network)
+    # setPriceCache("stock_cache")
+
+    # Uncomment To Run Without A Network On Generated Stock Data (Or DirectorySource("folder") / PriceStore("folder") For Saved Files)
+    # setDataSource(SyntheticSource(seed=0))
+
     """
     Below are a number of variables that you can change in order to test this code however you would like.
 
@@ -1,7 +1,10 @@
 import numpy as np
+import copy
 import datetime
 from tabulate import tabulate
-from fetchStocks import StockData
+from fetchStocks import StockData, PriceCache, set_price_cache, set_data_source, fetch_many_stocks
+from dataSources import YahooSource, DirectorySource, SyntheticSource
+from priceStore import PriceStore
 from simulateSDE import *
 from plot import *
 from analysis import *
@@ -24,14 +27,71 @@ PARAMETER_FUNCTIONS =   {
                             "Method Of Moments" : (muMethodOfMoments, sigmaMethodOfMoments),
                         }
 
+BIT_GENERATORS =    {
+                        "PCG64": np.random.PCG64,
+                        "Philox": np.random.Philox,
+                    }
+
+# Above this many paths (or for a memmap) the middle path is found by the sampled search instead of the O(P^2) exact one
+EXACT_MIDDLE_PATH_LIMIT = 20000
+
 SIMULATION_SEED = None
-def setSeed(seed = None):
+SIMULATION_BIT_GENERATOR = "PCG64"
+def setSeed(seed = None, bit_generator = "PCG64"):
+    global SIMULATION_SEED, SIMULATION_BIT_GENERATOR
+    if bit_generator not in BIT_GENERATORS:
+        raise ValueError(f"bit_generator must be one of {list(BIT_GENERATORS.keys())}")
     SIMULATION_SEED = seed
+    SIMULATION_BIT_GENERATOR = bit_generator
     if(SIMULATION_SEED is None):
         SIMULATION_SEED = np.random.randint(0,1000)
+    # Still seed the global state for anything that draws from it (e.g. the KDE sampling)
     np.random.seed(SIMULATION_SEED)
     print("Seed:", SIMULATION_SEED)
 
+def makeGenerator(seed = None, bit_generator = None):
+    """
+    Create a new random number generator for a simulation.
+
+    Args:
+        seed (int, optional): Seed for the generator. Defaults to None (the seed set by setSeed).
+        bit_generator (str, optional): "PCG64" or "Philox". Defaults to None (the bit generator set by setSeed).
+
+    Returns:
+        numpy.random.Generator: Generator that can be passed to the simulate functions to replay a run exactly.
+    """
+    if seed is None:
+        seed = SIMULATION_SEED
+    if bit_generator is None:
+        bit_generator = SIMULATION_BIT_GENERATOR
+    return np.random.Generator(BIT_GENERATORS[bit_generator](seed))
+
+def setPriceCache(directory = None, offline = False):
+    """
+    Cache downloaded stock data on disk, so later runs only fetch the days they are missing.
+
+    Args:
+        directory (str, optional): Directory to keep the cached files in. Defaults to None (no cache, always download).
+        offline (bool, optional): Never download; only use data already in the cache. Defaults to False.
+
+    Returns:
+        None
+    """
+    set_price_cache(None if directory is None else PriceCache(directory, offline))
+
+def setDataSource(source = None):
+    """
+    Choose where stock data comes from, e.g. a local directory or synthetic data to run without a network.
+
+    Args:
+        source (object, optional): Data source such as DirectorySource("data"), PriceStore("store") or SyntheticSource(seed).
+            Defaults to None (Yahoo Finance).
+
+    Returns:
+        None
+    """
+    set_data_source(source)
+
 # Function to check if a date string is in the correct format (YYYY-MM-DD)
 def is_valid_date(date_str):
     if date_str is None:
@@ -76,7 +136,58 @@ def is_before_date(date1_str, date2_str):
 
 # Functions For Simulating Based On Methods Compared To True Stock Value
 
-def simulateSingleMethod(ticker, data_start_date, data_end_date, sim_end_date, method_name, stock_data = None):
+def simulatePaths(stock, mu_function, sigma_function, T, dt, num_paths, workers, rng, dW, scheme, dtype, memmap_file):
+    """
+    Run the simulation engine that matches the requested options.
+
+    Args:
+        stock (StockData): Object containing the historical stock data to simulate from.
+        mu_function (function): Function to compute the drift parameter (mu).
+        sigma_function (function): Function to compute the volatility parameter (sigma).
+        T (float): Time horizon (in years) for simulation.
+        dt (float): Time step (in years) for simulation.
+        num_paths (int): Number of paths to simulate.
+        workers (int): Number of processes to simulate with in parallel, or None for a single process.
+        rng (numpy.random.Generator): Random number generator for the simulation.
+        dW (numpy.ndarray): Precomputed Brownian increments, or None to draw new ones.
+        scheme (str): Sampling scheme, one of "pseudo", "antithetic" or "sobol".
+        dtype (numpy.dtype): Floating point type of the simulated matrix.
+        memmap_file (str): File to write the simulated matrix to, or None to keep it in memory.
+
+    Returns:
+        numpy.ndarray: Matrix describing the multiple paths.
+    """
+    if(workers is not None and dW is not None):
+        raise ValueError("common_random_numbers cannot be used with parallel workers")
+    if(workers is not None and scheme != "pseudo"):
+        raise ValueError("parallel workers only support the pseudo sampling scheme")
+    if(memmap_file is not None and (workers is not None or dW is not None)):
+        raise ValueError("memmap_file cannot be used with parallel workers or common_random_numbers")
+
+    if(memmap_file is not None):
+        return simulate_stock_prices_memmap(stock, mu_function, sigma_function, memmap_file, T = T, dt = dt, num_paths = num_paths, rng = rng, scheme = scheme, dtype = dtype)
+    if(workers is not None):
+        # Spawning a child seed advances rng, so repeated calls draw new paths as the serial engine does
+        seed = rng.bit_generator.seed_seq.spawn(1)[0]
+        return simulate_stock_prices_parallel(stock, mu_function, sigma_function, T = T, dt = dt, num_paths = num_paths, seed = seed, max_workers = workers, bit_generator = type(rng.bit_generator)).astype(dtype, copy = False)
+    return simulate_stock_prices(stock, mu_function, sigma_function, T = T, dt = dt, num_paths = num_paths, rng = rng, dW = dW, scheme = scheme, dtype = dtype)
+
+def selectMiddlePath(simulation, rng):
+    """
+    Selects the middle path exactly, or with the sampled search for a memmap or more than EXACT_MIDDLE_PATH_LIMIT paths.
+
+    Args:
+        simulation (numpy.ndarray): Matrix describing the multiple paths.
+        rng (numpy.random.Generator): Random number generator for the sampled search.
+
+    Returns:
+        tuple: (middle path, bound on how far its cumulative distance is above the smallest, as a fraction of the smallest)
+    """
+    if(isinstance(simulation, np.memmap) or len(simulation) > EXACT_MIDDLE_PATH_LIMIT):
+        return select_middle_path(simulation, approximate = True, rng = rng)
+    return select_middle_path(simulation), 0.0
+
+def simulateSingleMethod(ticker, data_start_date, data_end_date, sim_end_date, method_name, stock_data = None, num_paths = 10, workers = None, rng = None, common_random_numbers = None, scheme = "pseudo", dtype = np.float64, memmap_file = None, analytic = False):
     """
     Simulate a single method for stock price prediction.
 
@@ -87,6 +198,15 @@ def simulateSingleMethod(ticker, data_start_date, data_end_date, sim_end_date, m
         sim_end_date (str): End date of the simulation.
         method_name (str): Name of the simulation method.
         stock_data (StockData, optional): Object containing historical stock data. Defaults to None.
+        num_paths (int, optional): Number of paths to simulate. Defaults to 10.
+        workers (int, optional): Number of processes to simulate with in parallel. Defaults to None (single process).
+        rng (numpy.random.Generator, optional): Random number generator for the simulation. Defaults to None (a new one from makeGenerator).
+        common_random_numbers (CommonRandomNumbers, optional): Shared source of shocks, so several methods use the same noise. Defaults to None.
+        scheme (str, optional): Sampling scheme, one of "pseudo", "antithetic" or "sobol". Defaults to "pseudo".
+        dtype (numpy.dtype, optional): Floating point type of the simulated matrix, e.g. numpy.float32 to halve memory. Defaults to numpy.float64.
+        memmap_file (str, optional): File to simulate into as a numpy.memmap, for path counts larger than memory. Defaults to None.
+        analytic (bool, optional): For static parameter functions, compute the summary paths and the analysis in closed form
+            instead of simulating. 'simulation' then holds the quantile paths and the middle path is the median path. Defaults to False.
 
     Returns:
         dict: Dictionary containing simulation data.
@@ -102,22 +222,46 @@ def simulateSingleMethod(ticker, data_start_date, data_end_date, sim_end_date, m
     if(not is_past_date(sim_end_date)):
         raise ValueError("simulation must be of past dates to compare to true stock values")
     mu_function, sigma_function = PARAMETER_FUNCTIONS[method_name]
+    if(rng is None):
+        rng = makeGenerator()
     # Set Up Stock And "Previous History"
     if(stock_data is None):
         stock = StockData(ticker)
     else:
         stock = stock_data
-    data = StockData(ticker, stock.getStockDataRange(data_start_date, data_end_date), stock.market_data_df)
-    trueStockData = StockData(ticker,stock.getStockDataRange(data.end_date, sim_end_date), stock.market_data_df)
+    data = stock.view(data_start_date, data_end_date)
+    trueStockData = stock.view(data.end_date, sim_end_date)
 
     trueStockPrices = trueStockData.getClosingPrices()  
+    dt = 1/(len(trueStockPrices)-1)
+
+    if analytic:
+        summaries = analytic_gbm_summaries(data, mu_function, sigma_function, 1, dt, FAN_QUANTILES)
+        simulation_data = analyticRecord(ticker, method_name, summaries)
+        simulation_data['true_stock_data'] = trueStockData
+        simulation_data['true_stock_prices'] = trueStockPrices
+        single_paths = [simulation_data['mean_path'], simulation_data['median_path'], simulation_data['middle_path']]
+        multiA, (meanA, medianA, middleA) = analyzeAllAnalytic(trueStockPrices, summaries['initial_price'], summaries['mu'], summaries['sigma'], summaries['times'], single_paths)
+        simulation_data['analysis'] = {
+            "Multi_Analysis" : multiA,
+            "Mean_Analysis" : meanA,
+            "Median_Analysis" : medianA,
+            "Middle_Analysis" : middleA,
+        }
+        return simulation_data
+
+    dW = None
+    if(common_random_numbers is not None):
+        dW = common_random_numbers.increments(num_paths, int(1/dt), dt, dtype)
     # Simulate Stock Price
-    simulation = simulate_stock_prices(data, mu_function, sigma_function, dt = 1/(len(trueStockPrices)-1))
+    simulation = simulatePaths(data, mu_function, sigma_function, 1, dt, num_paths, workers, rng, dW, scheme, dtype, memmap_file)
+    chunk_size = 10000 if memmap_file is not None else None
 
     # Extrapolate Single Paths
-    middle = select_middle_path(simulation)
-    median = compute_median_path(simulation)
-    mean = compute_mean_path(simulation)
+    middle, middle_error_bound = selectMiddlePath(simulation, rng)
+    quantiles = compute_quantile_paths(simulation, FAN_QUANTILES, chunk_size)
+    median = quantiles[FAN_QUANTILES.index(0.5)]
+    mean = compute_mean_path(simulation, chunk_size)
 
     simulation_data =   {
                             'ticker': ticker,
@@ -126,13 +270,39 @@ def simulateSingleMethod(ticker, data_start_date, data_end_date, sim_end_date, m
                             'true_stock_prices': trueStockPrices,
                             'simulation': simulation,
                             'middle_path': middle,
+                            'middle_path_error_bound': middle_error_bound,
                             'median_path': median,
                             'mean_path': mean,
+                            'quantile_paths': dict(zip(FAN_QUANTILES, quantiles)),
+                            'variance_reduction': variance_reduction(simulation, scheme),
                         }
     
     return simulation_data
 
-def simulateAllMethods(ticker, data_start_date, data_end_date, sim_end_date):
+def analyticRecord(ticker, method_name, summaries):
+    """
+    Builds a simulation record from closed-form summaries, so it can be used wherever a simulated one is.
+
+    Args:
+        ticker (str): Ticker symbol of the stock.
+        method_name (str): Name of the simulation method.
+        summaries (dict): Closed-form summaries as returned by analytic_gbm_summaries.
+
+    Returns:
+        dict: Dictionary containing simulation data, with the quantile paths standing in for the simulated paths.
+    """
+    quantile_paths = summaries['quantile_paths']
+    return {
+        'ticker': ticker,
+        'method_name': method_name,
+        'simulation': np.stack(list(quantile_paths.values())),
+        'middle_path': summaries['median_path'],
+        'median_path': summaries['median_path'],
+        'mean_path': summaries['mean_path'],
+        'quantile_paths': quantile_paths,
+    }
+
+def simulateAllMethods(ticker, data_start_date, data_end_date, sim_end_date, stock_data = None, rng = None, num_paths = 10, common_random_numbers = False, scheme = "pseudo"):
     """
     Simulate all methods for stock price prediction.
 
@@ -141,17 +311,28 @@ def simulateAllMethods(ticker, data_start_date, data_end_date, sim_end_date):
         data_start_date (str): Start date of historical data.
         data_end_date (str): End date of historical data.
         sim_end_date (str): End date of the simulation.
+        stock_data (StockData, optional): Object containing historical stock data. Defaults to None.
+        rng (numpy.random.Generator, optional): Random number generator for the simulations. Defaults to None (a new one from makeGenerator).
+        num_paths (int, optional): Number of paths to simulate per method. Defaults to 10.
+        common_random_numbers (bool, optional): Draw one shock matrix and reuse it for every method. Defaults to False.
+        scheme (str, optional): Sampling scheme, one of "pseudo", "antithetic" or "sobol". Defaults to "pseudo".
 
     Returns:
         list: List of dictionaries containing simulation data for each method.
     """
     # Each Time You Compare Remember To Reset The Seed
+    # (Every method gets its own copy of the generator, so they all start from the same state)
     # Going To Be A List Of (Methodname: Dictionary)
     simulation_results = []
-    stock = StockData(ticker)
+    if(rng is None):
+        rng = makeGenerator()
+    if(stock_data is None):
+        stock = StockData(ticker)
+    else:
+        stock = stock_data
+    shocks = CommonRandomNumbers(rng, scheme) if common_random_numbers else None
     for method_name, param_funcs in PARAMETER_FUNCTIONS.items():
-        np.random.seed(SIMULATION_SEED)
-        simulation_data = simulateSingleMethod(ticker, data_start_date, data_end_date, sim_end_date, method_name, stock)
+        simulation_data = simulateSingleMethod(ticker, data_start_date, data_end_date, sim_end_date, method_name, stock, num_paths = num_paths, rng = copy.deepcopy(rng), common_random_numbers = shocks, scheme = scheme)
         print(f"Simulation Complete: [{method_name}]")
         simulation_results.append(simulation_data)
         
@@ -197,23 +378,30 @@ def compareMultipleMethods(simulation_data_list, analyze = True, plot = True, co
         print("\nAnalysis For: ",simulation_data_list[0]["ticker"])
         print(createTable(simulation_data_list, compact))
 
-def simulateManyStocks(tickers, data_start_date, data_end_date, sim_end_date):
+def simulateManyStocks(tickers, data_start_date, data_end_date, sim_end_date, rng = None):
     """
     Simulate multiple stocks using a single method.
 
+    The stocks are fetched together up front; a ticker that cannot be fetched is reported and skipped.
+
     Args:
         tickers (list): List of stock ticker symbols.
         data_start_date (str): Start date of historical data.
         data_end_date (str): End date of historical data.
         sim_end_date (str): End date of the simulation.
-        method_name (str): Name of the simulation method.
+        rng (numpy.random.Generator, optional): Random number generator, split into an independent stream per stock. Defaults to None (a new one from makeGenerator).
 
     Returns:
         list: List of dictionaries containing simulation data for each stock.
     """
     stock_data_list = []
-    for ticker in tickers:
-        simulation_data = simulateAllMethods(ticker, data_start_date, data_end_date, sim_end_date)
+    if(rng is None):
+        rng = makeGenerator()
+    stocks = fetch_many_stocks(tickers)
+    for ticker, ticker_rng in zip(tickers, rng.spawn(len(tickers))):
+        if ticker not in stocks:
+            continue
+        simulation_data = simulateAllMethods(ticker, data_start_date, data_end_date, sim_end_date, stock_data = stocks[ticker], rng = ticker_rng)
         stock_data_list.append(simulation_data)
     return stock_data_list
 
@@ -313,7 +501,7 @@ def createTable(simulation_data_list, compact = False):
 
 # Functions For Simulating The Future Of A Stock
 
-def simulateFutureSingle(ticker, data_start_date, sim_end_date, method_name, stock_data=None):
+def simulateFutureSingle(ticker, data_start_date, sim_end_date, method_name, stock_data=None, num_paths=10, workers=None, rng=None, common_random_numbers=None, scheme="pseudo", dtype=np.float64, memmap_file=None, terminal_only=False, analytic=False):
     """
     Simulate future stock prices from today using a specified method.
 
@@ -323,6 +511,17 @@ def simulateFutureSingle(ticker, data_start_date, sim_end_date, method_name, sto
         sim_end_date (str): End date for simulation.
         method_name (str): Name of the simulation method.
         stock_data (StockData, optional): Object containing historical stock data. Defaults to None.
+        num_paths (int, optional): Number of paths to simulate. Defaults to 10.
+        workers (int, optional): Number of processes to simulate with in parallel. Defaults to None (single process).
+        rng (numpy.random.Generator, optional): Random number generator for the simulation. Defaults to None (a new one from makeGenerator).
+        common_random_numbers (CommonRandomNumbers, optional): Shared source of shocks, so several methods use the same noise. Defaults to None.
+        scheme (str, optional): Sampling scheme, one of "pseudo", "antithetic" or "sobol". Defaults to "pseudo".
+        dtype (numpy.dtype, optional): Floating point type of the simulated matrix, e.g. numpy.float32 to halve memory. Defaults to numpy.float64.
+        memmap_file (str, optional): File to simulate into as a numpy.memmap, for path counts larger than memory. Defaults to None.
+        terminal_only (bool, optional): Only simulate the price at sim_end_date. The record then holds 'terminal_prices'
+            and 'terminal_summary' instead of paths. Defaults to False.
+        analytic (bool, optional): For static parameter functions, compute the summary paths in closed form instead of
+            simulating. 'simulation' then holds the quantile paths and the middle path is the median path. Defaults to False.
 
     Returns:
         dict: Dictionary containing simulation data.
@@ -341,34 +540,57 @@ def simulateFutureSingle(ticker, data_start_date, sim_end_date, method_name, sto
         raise ValueError("Start date must be before simulation end date.")
 
     mu_function, sigma_function = PARAMETER_FUNCTIONS[method_name]
+    if(rng is None):
+        rng = makeGenerator()
     if(stock_data is None):
         stock = StockData(ticker)
     else:
         stock = stock_data
-    data = StockData(ticker, stock.getStockDataRange(data_start_date, None), stock.market_data_df)
+    data = stock.view(data_start_date, None)
 
     date_range = pd.date_range(start=data.end_date, end=sim_end_date, freq='B')  # 'B' stands for business days
     time = len(date_range) / 252
 
-    simulation = simulate_stock_prices(data, mu_function, sigma_function, T=time, dt=1/252)
+    if analytic:
+        return analyticRecord(ticker, method_name, analytic_gbm_summaries(data, mu_function, sigma_function, time, 1/252, FAN_QUANTILES))
+
+    if terminal_only:
+        terminal = simulate_terminal_prices(data, mu_function, sigma_function, T=time, dt=1/252, num_paths=num_paths, rng=rng)
+        return {
+            'ticker': ticker,
+            'method_name': method_name,
+            'terminal_prices': terminal,
+            'terminal_summary': summarize_terminal_prices(terminal),
+        }
+
+    dW = None
+    if common_random_numbers is not None:
+        dW = common_random_numbers.increments(num_paths, int(time/(1/252)), 1/252, dtype)
+
+    simulation = simulatePaths(data, mu_function, sigma_function, time, 1/252, num_paths, workers, rng, dW, scheme, dtype, memmap_file)
+    chunk_size = 10000 if memmap_file is not None else None
 
     # Extrapolate Single Paths
-    middle = select_middle_path(simulation)
-    median = compute_median_path(simulation)
-    mean = compute_mean_path(simulation)
+    middle, middle_error_bound = selectMiddlePath(simulation, rng)
+    quantiles = compute_quantile_paths(simulation, FAN_QUANTILES, chunk_size)
+    median = quantiles[FAN_QUANTILES.index(0.5)]
+    mean = compute_mean_path(simulation, chunk_size)
 
     simulation_data = {
         'ticker': ticker,
         'method_name': method_name,
         'simulation': simulation,
         'middle_path': middle,
+        'middle_path_error_bound': middle_error_bound,
         'median_path': median,
         'mean_path': mean,
+        'quantile_paths': dict(zip(FAN_QUANTILES, quantiles)),
+        'variance_reduction': variance_reduction(simulation, scheme),
     }
     
     return simulation_data
 
-def simulateFutureAllMethods(ticker, data_start_date, sim_end_date):
+def simulateFutureAllMethods(ticker, data_start_date, sim_end_date, rng=None, num_paths=10, common_random_numbers=False, scheme="pseudo"):
     """
     Simulates future stock prices using different methods.
 
@@ -376,15 +598,21 @@ def simulateFutureAllMethods(ticker, data_start_date, sim_end_date):
         ticker (str): Ticker symbol of the stock.
         data_start_date (str): Start date for historical data.
         sim_end_date (str): End date for simulation.
+        rng (numpy.random.Generator, optional): Random number generator for the simulations. Defaults to None (a new one from makeGenerator).
+        num_paths (int, optional): Number of paths to simulate per method. Defaults to 10.
+        common_random_numbers (bool, optional): Draw one shock matrix and reuse it for every method. Defaults to False.
+        scheme (str, optional): Sampling scheme, one of "pseudo", "antithetic" or "sobol". Defaults to "pseudo".
 
     Returns:
         list: List of dictionaries containing simulation data for each method.
     """
     simulation_results = []
+    if(rng is None):
+        rng = makeGenerator()
     stock = StockData(ticker)
+    shocks = CommonRandomNumbers(rng, scheme) if common_random_numbers else None
     for method_name, param_funcs in PARAMETER_FUNCTIONS.items():
-        np.random.seed(SIMULATION_SEED)
-        simulation_data = simulateFutureSingle(ticker, data_start_date, sim_end_date, method_name, stock)
+        simulation_data = simulateFutureSingle(ticker, data_start_date, sim_end_date, method_name, stock, num_paths=num_paths, rng=copy.deepcopy(rng), common_random_numbers=shocks, scheme=scheme)
         print(f"Simulation Complete: [{method_name}]")
         simulation_results.append(simulation_data)
         
@@ -0,0 +1,126 @@
+import numpy as np
+from fetchStocks import StockData
+from runningStats import RunningReturns
+
+# Numba is optional: without it, simulate_stock_prices_jit falls back to the NumPy incremental engine
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Statistics the kernel knows how to step, by the name estimators give in their kernel attribute
+KERNEL_CODES =  {
+                    "constant": 0,
+                    "circular_mean_simple": 1,
+                    "circular_std_simple": 2,
+                    "circular_std_log": 3,
+                    "mean_log": 4,
+                    "population_std_log": 5,
+                }
+
+def supports_kernel(estimator):
+    """
+    Checks whether the compiled kernel can step an estimator.
+
+    Args:
+        estimator (object): Estimator from parameterTypes.make_estimator.
+
+    Returns:
+        bool: True if the estimator names a statistic the kernel knows.
+    """
+    return getattr(estimator, "kernel", None) in KERNEL_CODES
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _circular(count, mean, m2, wrapped_return):
+        # Welford update with the np.roll wrap-around return, without changing the running state
+        count = count + 1
+        delta = wrapped_return - mean
+        mean = mean + delta / count
+        m2 = m2 + delta * (wrapped_return - mean)
+        return count, mean, m2
+
+    @njit(cache=True)
+    def _parameter(code, value, dt, first_price, last_price, simple_count, simple_mean, simple_m2, log_count, log_mean, log_m2):
+        if code == 0:
+            return value
+        if code == 1:
+            count, mean, m2 = _circular(simple_count, simple_mean, simple_m2, (first_price - last_price) / last_price)
+            return mean / dt
+        if code == 2:
+            count, mean, m2 = _circular(simple_count, simple_mean, simple_m2, (first_price - last_price) / last_price)
+            return np.sqrt(m2 / ((count - 1) * dt))
+        if code == 3:
+            count, mean, m2 = _circular(log_count, log_mean, log_m2, np.log(first_price) - np.log(last_price))
+            return np.sqrt(m2 / ((count - 1) * dt))
+        if code == 4:
+            return log_mean / dt
+        return np.sqrt(log_m2 / log_count) / np.sqrt(dt)
+
+    @njit(parallel=True, cache=True)
+    def _gbm_kernel(prices, dW, dt, mu_code, mu_value, sigma_code, sigma_value, first_price, history_last,
+                    simple_count, simple_mean, simple_m2, log_count, log_mean, log_m2):
+        num_paths, num_steps = dW.shape
+        for i in prange(num_paths):
+            last_price = history_last
+            s_count, s_mean, s_m2 = simple_count, simple_mean, simple_m2
+            l_count, l_mean, l_m2 = log_count, log_mean, log_m2
+            for j in range(1, num_steps + 1):
+                price = prices[i, j-1]
+
+                # Running statistics of the simple and log returns, including the newest price
+                r = (price - last_price) / last_price
+                s_count += 1
+                delta = r - s_mean
+                s_mean += delta / s_count
+                s_m2 += delta * (r - s_mean)
+
+                r = np.log(price) - np.log(last_price)
+                l_count += 1
+                delta = r - l_mean
+                l_mean += delta / l_count
+                l_m2 += delta * (r - l_mean)
+
+                last_price = price
+
+                mu = _parameter(mu_code, mu_value, dt, first_price, last_price, s_count, s_mean, s_m2, l_count, l_mean, l_m2)
+                sigma = _parameter(sigma_code, sigma_value, dt, first_price, last_price, s_count, s_mean, s_m2, l_count, l_mean, l_m2)
+                prices[i, j] = price * np.exp((mu - 0.5 * sigma**2) * dt + sigma * dW[i, j-1])
+
+def simulate_stock_prices_jit(stock_history: StockData, mu_estimator, sigma_estimator, dW, dt, dtype = np.float64):
+    """
+    Simulates future stock prices with the Numba-compiled step loop, parallelized over paths.
+
+    Gives the same results as simulate_stock_prices_incremental (and the per-path Python reference).
+    Without Numba, or if an estimator is not supported by the kernel, the NumPy incremental engine is used.
+
+    Args:
+        stock_history (StockData): Object containing historical stock data.
+        mu_estimator (object): Estimator for the drift parameter (see parameterTypes.make_estimator).
+        sigma_estimator (object): Estimator for the volatility parameter (see parameterTypes.make_estimator).
+        dW (numpy.ndarray): Brownian increments (shape: num_paths x num_steps).
+        dt (float): Time step (in years) for simulation.
+        dtype (numpy.dtype): Floating point type of the returned matrix. Default is numpy.float64.
+
+    Returns:
+        numpy.ndarray: Matrix describing the multiple paths.
+    """
+    if not (NUMBA_AVAILABLE and supports_kernel(mu_estimator) and supports_kernel(sigma_estimator)):
+        from simulateSDE import simulate_stock_prices_incremental
+        return simulate_stock_prices_incremental(stock_history, mu_estimator, sigma_estimator, dW, dt, dtype)
+
+    history = stock_history.getClosingPrices()
+    simple = RunningReturns(history, 1, log_returns=False, history_returns=stock_history.getReturns())
+    log = RunningReturns(history, 1, log_returns=True, history_returns=stock_history.getReturns(log_returns=True))
+
+    num_paths, num_steps = dW.shape
+    prices = np.zeros((num_paths, num_steps+1), dtype=dtype)
+    prices[:, 0] = stock_history.getMostCurrentPrice()
+
+    _gbm_kernel(prices, np.ascontiguousarray(dW, dtype=np.float64), float(dt),
+                KERNEL_CODES[mu_estimator.kernel], float(mu_estimator.estimate()[0]) if mu_estimator.kernel == "constant" else 0.0,
+                KERNEL_CODES[sigma_estimator.kernel], float(sigma_estimator.estimate()[0]) if sigma_estimator.kernel == "constant" else 0.0,
+                float(simple.first_price), float(simple.last_price[0]),
+                simple.count, float(simple.mean[0]), float(simple.m2[0]), log.count, float(log.mean[0]), float(log.m2[0]))
+    return prices
@@ -0,0 +1,138 @@
+import numpy as np
+
+STATIC = "static"
+PATH_DEPENDENT = "path-dependent"
+
+def static(parameter_function):
+    """
+    Marks a parameter function as static, meaning its value depends only on the historical stock data
+    (and T, dt) and never on the simulated path, so it only needs to be computed once per StockData.
+
+    Args:
+        parameter_function (function): Parameter function with the signature (stock, estimations, T, dt, pathIndex, futureTimeIndex).
+
+    Returns:
+        function: The same function, tagged as static.
+    """
+    parameter_function.parameter_type = STATIC
+    return parameter_function
+
+def path_dependent(parameter_function = None, vectorized = None):
+    """
+    Marks a parameter function as path-dependent, meaning it has to be evaluated for every path and step.
+
+    Can be used as @path_dependent or as @path_dependent(vectorized=EstimatorClass), where the estimator
+    class computes the same parameter for all paths at once. An estimator is constructed with
+    (stock, T, dt, num_paths), receives the newest simulated price of every path through update(prices)
+    and returns the parameter for every path from estimate(). It may also name the statistic it computes
+    in a kernel attribute, so the compiled kernel in numbaKernels.py can step it.
+
+    Args:
+        parameter_function (function): Parameter function with the signature (stock, estimations, T, dt, pathIndex, futureTimeIndex).
+        vectorized (class, optional): Estimator class computing the parameter for all paths at once. Defaults to None.
+
+    Returns:
+        function: The same function, tagged as path-dependent (or a decorator doing so).
+    """
+    def tag(function):
+        function.parameter_type = PATH_DEPENDENT
+        function.vectorized = vectorized
+        return function
+
+    if parameter_function is None:
+        return tag
+    return tag(parameter_function)
+
+def is_static(parameter_function):
+    """
+    Checks whether a parameter function has been declared static. Untagged functions are treated as path-dependent.
+
+    Args:
+        parameter_function (function): Parameter function to check.
+
+    Returns:
+        bool: True if the function is static.
+    """
+    return getattr(parameter_function, "parameter_type", PATH_DEPENDENT) == STATIC
+
+def evaluate_static(parameter_function, stock, T, dt):
+    """
+    Evaluates a static parameter function, caching the value on the StockData object.
+
+    Args:
+        parameter_function (function): Static parameter function.
+        stock (StockData): Object containing historical stock data.
+        T (float): Time horizon (in years) for simulation.
+        dt (float): Time step (in years) for simulation.
+
+    Returns:
+        float: Value of the parameter.
+    """
+    key = (parameter_function, T, dt)
+    if key not in stock.parameter_cache:
+        stock.parameter_cache[key] = parameter_function(stock, None, T, dt, None, None)
+    return stock.parameter_cache[key]
+
+class StaticEstimator:
+    """
+    Estimator interface wrapper around a static parameter value, so static and vectorized
+    path-dependent parameters can be stepped together.
+    """
+
+    kernel = "constant"
+
+    def __init__(self, value, num_paths):
+        """
+        Initializes the estimator with the static value.
+
+        Args:
+            value (float): Value of the static parameter.
+            num_paths (int): Number of simulated paths.
+
+        Returns:
+            None
+        """
+        self.value = np.full(num_paths, value, dtype=float)
+
+    def update(self, prices):
+        """
+        Static parameters ignore the simulated prices.
+
+        Args:
+            prices (numpy.ndarray): Newest simulated price of each path.
+
+        Returns:
+            None
+        """
+        pass
+
+    def estimate(self):
+        """
+        Returns the static value for every path.
+
+        Returns:
+            numpy.ndarray: Parameter value for each path.
+        """
+        return self.value
+
+def make_estimator(parameter_function, stock, T, dt, num_paths):
+    """
+    Builds an estimator computing a parameter for all paths at once.
+
+    Args:
+        parameter_function (function): Parameter function.
+        stock (StockData): Object containing historical stock data.
+        T (float): Time horizon (in years) for simulation.
+        dt (float): Time step (in years) for simulation.
+        num_paths (int): Number of paths to simulate.
+
+    Returns:
+        object: Estimator with update(prices) and estimate() methods, or None if the function
+            is path-dependent without a vectorized estimator.
+    """
+    if is_static(parameter_function):
+        return StaticEstimator(evaluate_static(parameter_function, stock, T, dt), num_paths)
+    vectorized = getattr(parameter_function, "vectorized", None)
+    if vectorized is None:
+        return None
+    return vectorized(stock, T, dt, num_paths)
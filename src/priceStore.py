@@ -0,0 +1,192 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Price columns kept in the store, one (dates x tickers) matrix each
+PRICE_FIELDS = ("Close", "Adj Close")
+
+class PriceStore:
+    """
+    Columnar store of daily prices for a whole universe of tickers, memory-mapped from a local directory.
+
+    All tickers share one trading-date index. Each price field is a (dates x tickers) matrix in Fortran order,
+    so a ticker's history is one contiguous column, and a validity mask marks the dates a ticker has prices for.
+    A ticker and date range is located with searchsorted and read as a slice of the mapped file, without copying.
+
+    The store is also a data source (see dataSources): pass it to set_data_source or StockData(data_source=...)
+    to build StockData objects from it.
+
+    Attributes:
+        directory (str): Directory holding the store.
+        tickers (list): Ticker of each column.
+        columns (dict): Column of each ticker.
+        dates (pandas.DatetimeIndex): Trading-date index shared by every ticker.
+        prices (dict): Memory-mapped (dates x tickers) matrix for each field in PRICE_FIELDS.
+        valid (numpy.ndarray): Memory-mapped (dates x tickers) mask, True where a ticker has prices.
+    """
+
+    def __init__(self, directory):
+        """
+        Opens an existing store.
+
+        Args:
+            directory (str): Directory holding the store (see build).
+
+        Returns:
+            None
+        """
+        self.directory = directory
+        with open(os.path.join(directory, "tickers.json")) as file:
+            self.tickers = json.load(file)
+        self.columns = {ticker: column for column, ticker in enumerate(self.tickers)}
+        self.dates = pd.DatetimeIndex(np.load(os.path.join(directory, "dates.npy")), name='Date')
+        self.prices = {field: np.load(self.path(directory, field), mmap_mode='r') for field in PRICE_FIELDS}
+        self.valid = np.load(os.path.join(directory, "valid.npy"), mmap_mode='r')
+
+    @staticmethod
+    def path(directory, field):
+        """
+        Returns:
+            str: File holding the matrix of a price field.
+        """
+        return os.path.join(directory, field.lower().replace(" ", "_") + ".npy")
+
+    @classmethod
+    def build(cls, directory, stock_frames):
+        """
+        Writes a store from the daily data of each ticker, one column at a time so the universe never has to fit in memory.
+
+        Args:
+            directory (str): Directory to write the store to.
+            stock_frames (dict): DataFrame of daily data (with the PRICE_FIELDS columns) for each ticker.
+
+        Returns:
+            PriceStore: The written store, opened.
+        """
+        os.makedirs(directory, exist_ok=True)
+        tickers = list(stock_frames)
+        dates = pd.DatetimeIndex(sorted(set().union(*(frame.index for frame in stock_frames.values()))))
+        shape = (len(dates), len(tickers))
+
+        matrices = {field: np.lib.format.open_memmap(cls.path(directory, field), mode='w+', dtype=np.float64, shape=shape, fortran_order=True)
+                    for field in PRICE_FIELDS}
+        valid = np.lib.format.open_memmap(os.path.join(directory, "valid.npy"), mode='w+', dtype=np.bool_, shape=shape, fortran_order=True)
+        for column, ticker in enumerate(tickers):
+            frame = stock_frames[ticker]
+            rows = dates.get_indexer(frame.index)
+            for field in PRICE_FIELDS:
+                matrices[field][:, column] = np.nan
+                matrices[field][rows, column] = frame[field].to_numpy(dtype=np.float64)
+            valid[:, column] = False
+            valid[rows, column] = ~np.isnan(matrices["Close"][rows, column])
+        for matrix in list(matrices.values()) + [valid]:
+            matrix.flush()
+        del matrices, valid
+
+        np.save(os.path.join(directory, "dates.npy"), dates.values.astype('datetime64[ns]'))
+        with open(os.path.join(directory, "tickers.json"), "w") as file:
+            json.dump(tickers, file)
+        return cls(directory)
+
+    @classmethod
+    def from_source(cls, directory, source, tickers, start_date = None, end_date = None):
+        """
+        Writes a store from another data source, e.g. to snapshot Yahoo Finance for offline runs.
+
+        Args:
+            directory (str): Directory to write the store to.
+            source (object): Data source to read from (see dataSources).
+            tickers (list): Tickers to include (add the market index to build StockData objects from the store).
+            start_date (datetime): Start date of the data. Defaults to None (the full history).
+            end_date (datetime): End date (exclusive) of the data. Defaults to None (today).
+
+        Returns:
+            PriceStore: The written store, opened.
+        """
+        return cls.build(directory, {ticker: source.fetch(ticker, start_date, end_date) for ticker in tickers})
+
+    def locate(self, start_date = None, end_date = None, inclusive = True):
+        """
+        Finds the rows of a date range.
+
+        Args:
+            start_date (datetime): Start date of the range. Defaults to None (the first date).
+            end_date (datetime): End date of the range. Defaults to None (the last date).
+            inclusive (bool): Whether the end date is included. Default is True.
+
+        Returns:
+            tuple: (start, stop) rows of the range.
+        """
+        start = 0 if start_date is None else self.dates.searchsorted(pd.Timestamp(start_date), side='left')
+        stop = len(self.dates) if end_date is None else self.dates.searchsorted(pd.Timestamp(end_date), side='right' if inclusive else 'left')
+        return start, stop
+
+    def column(self, ticker):
+        """
+        Returns:
+            int: Column of the ticker.
+        """
+        if ticker not in self.columns:
+            raise LookupError(f"{ticker} is not in the price store at {self.directory}")
+        return self.columns[ticker]
+
+    def window(self, ticker, field = "Close", start_date = None, end_date = None):
+        """
+        Returns the prices of a ticker over a date range as a view of the mapped file (NaN where the ticker has no price).
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            field (str): Price field, one of PRICE_FIELDS. Default is "Close".
+            start_date (datetime): Start date of the range (inclusive). Defaults to None (the first date).
+            end_date (datetime): End date of the range (inclusive). Defaults to None (the last date).
+
+        Returns:
+            numpy.ndarray: Read-only prices of the ticker for every date of the range.
+        """
+        start, stop = self.locate(start_date, end_date)
+        return self.prices[field][start:stop, self.column(ticker)]
+
+    def frame(self, ticker, start_date = None, end_date = None, inclusive = True):
+        """
+        Returns the daily data of a ticker over a date range, on the dates the ticker has prices for.
+
+        If the ticker has prices for every date between its first and last one in the range (the usual case),
+        the DataFrame's columns are views of the mapped file; otherwise the missing dates are dropped in a copy.
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            start_date (datetime): Start date of the range. Defaults to None (the first date).
+            end_date (datetime): End date of the range. Defaults to None (the last date).
+            inclusive (bool): Whether the end date is included. Default is True.
+
+        Returns:
+            pandas.DataFrame: DataFrame with the PRICE_FIELDS columns, indexed by date.
+        """
+        start, stop = self.locate(start_date, end_date, inclusive)
+        column = self.column(ticker)
+        rows = np.flatnonzero(self.valid[start:stop, column])
+        if len(rows) == 0:
+            return pd.DataFrame({field: np.empty(0) for field in PRICE_FIELDS}, index=self.dates[:0])
+
+        start, stop = start + rows[0], start + rows[-1] + 1
+        if len(rows) == stop - start:
+            return pd.DataFrame({field: self.prices[field][start:stop, column] for field in PRICE_FIELDS},
+                                index=self.dates[start:stop], copy=False)
+        mask = self.valid[start:stop, column]
+        return pd.DataFrame({field: self.prices[field][start:stop, column][mask] for field in PRICE_FIELDS},
+                            index=self.dates[start:stop][mask])
+
+    def fetch(self, ticker, start_date = None, end_date = None):
+        """
+        Reads the daily data of a ticker, as a data source.
+
+        Args:
+            ticker (str): Ticker symbol of the stock.
+            start_date (datetime): Start date for fetching data.
+            end_date (datetime): End date (exclusive) for fetching data.
+
+        Returns:
+            stock_data_df (pandas.DataFrame): DataFrame containing daily stock data.
+        """
+        return self.frame(ticker, start_date, end_date, inclusive=False)
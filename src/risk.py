@@ -0,0 +1,224 @@
+import numpy as np
+from simulateSDE import QuantilePathAccumulator
+
+# Losses are relative to the starting price: a loss of 0.1 means the price fell 10% from time 0
+
+def path_losses(simulated_paths):
+    """
+    Calculate the loss of every path at every step relative to the starting price.
+
+    Args:
+        simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+
+    Returns:
+        numpy.ndarray: Matrix of losses (shape: num_paths x num_steps).
+    """
+    return 1 - simulated_paths / simulated_paths[:, :1]
+
+def value_at_risk(simulated_paths, alpha=0.95):
+    """
+    Calculate the value at risk (VaR) at every horizon.
+
+    Args:
+        simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        alpha (float): Confidence level. Default is 0.95.
+
+    Returns:
+        numpy.ndarray: VaR of each step, as a fraction of the starting price.
+    """
+    return np.quantile(path_losses(simulated_paths), alpha, axis=0)
+
+def conditional_value_at_risk(simulated_paths, alpha=0.95):
+    """
+    Calculate the conditional value at risk (CVaR, expected shortfall) at every horizon:
+    the mean loss of the paths at or beyond the VaR.
+
+    Args:
+        simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        alpha (float): Confidence level. Default is 0.95.
+
+    Returns:
+        numpy.ndarray: CVaR of each step, as a fraction of the starting price.
+    """
+    losses = path_losses(simulated_paths)
+    tail = losses >= np.quantile(losses, alpha, axis=0)
+    return np.sum(losses * tail, axis=0) / np.sum(tail, axis=0)
+
+def max_drawdowns(simulated_paths):
+    """
+    Calculate the maximum drawdown of every path: the largest fall from a running peak.
+
+    Args:
+        simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+
+    Returns:
+        numpy.ndarray: Maximum drawdown of each path, as a fraction of the peak.
+    """
+    running_peak = np.maximum.accumulate(simulated_paths, axis=1)
+    return np.max(1 - simulated_paths / running_peak, axis=1)
+
+def barrier_hit_probabilities(simulated_paths, barrier, dt, sigma=None, bridge=True):
+    """
+    Calculate the probability that each path crosses a barrier at some point before the horizon.
+
+    A barrier below the starting price is a down barrier and one above is an up barrier. Checking only the
+    simulated steps misses crossings between them, so with bridge=True each step is corrected with the
+    Brownian bridge crossing probability exp(-2 * ln(S_j-1 / B) * ln(S_j / B) / (sigma^2 * dt)), which keeps
+    coarse dt grids accurate without simulating finer steps.
+
+    Args:
+        simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        barrier (float): Barrier price.
+        dt (float): Time step (in years) of the simulation.
+        sigma (float or numpy.ndarray, optional): Volatility for the bridge correction, either a constant or one per path.
+            Defaults to None (each path's realized volatility).
+        bridge (bool): Apply the Brownian bridge correction. Default is True.
+
+    Returns:
+        numpy.ndarray: Probability that each path hits the barrier.
+    """
+    log_distance = np.log(simulated_paths / barrier)
+    if simulated_paths[0, 0] < barrier:
+        log_distance = -log_distance
+
+    hit = np.any(log_distance <= 0, axis=1)
+    if not bridge:
+        return hit.astype(float)
+
+    if sigma is None:
+        sigma = np.std(np.diff(np.log(simulated_paths), axis=1), axis=1, ddof=1) / np.sqrt(dt)
+    variance = np.reshape(np.asarray(sigma, dtype=float)**2 * dt, (-1, 1))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = np.exp(-2 * np.maximum(log_distance[:, :-1], 0) * np.maximum(log_distance[:, 1:], 0) / variance)
+    crossing = np.nan_to_num(crossing, nan=0.0)
+    survival = np.prod(1 - crossing, axis=1)
+    return np.where(hit, 1.0, 1 - survival)
+
+def barrier_hit_probability(simulated_paths, barrier, dt, sigma=None, bridge=True):
+    """
+    Calculate the probability of crossing a barrier before the horizon, over all paths.
+
+    Args:
+        simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        barrier (float): Barrier price.
+        dt (float): Time step (in years) of the simulation.
+        sigma (float or numpy.ndarray, optional): Volatility for the bridge correction. Defaults to None (realized volatility).
+        bridge (bool): Apply the Brownian bridge correction. Default is True.
+
+    Returns:
+        float: Probability of hitting the barrier.
+    """
+    return np.mean(barrier_hit_probabilities(simulated_paths, barrier, dt, sigma, bridge))
+
+def analyzeRisk(simulated_paths, dt, alpha=0.95, barriers=(), sigma=None):
+    """
+    Calculates every risk metric for a matrix of simulated paths.
+
+    Args:
+        simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        dt (float): Time step (in years) of the simulation.
+        alpha (float): Confidence level for VaR and CVaR. Default is 0.95.
+        barriers (sequence): Barrier prices to report hit probabilities for. Default is none.
+        sigma (float or numpy.ndarray, optional): Volatility for the bridge correction. Defaults to None (realized volatility).
+
+    Returns:
+        dict: VaR and CVaR per step, the maximum drawdown of each path, and the hit probability of each barrier.
+    """
+    return {
+        'value_at_risk': value_at_risk(simulated_paths, alpha),
+        'conditional_value_at_risk': conditional_value_at_risk(simulated_paths, alpha),
+        'max_drawdowns': max_drawdowns(simulated_paths),
+        'barrier_hit_probabilities': {barrier: barrier_hit_probability(simulated_paths, barrier, dt, sigma) for barrier in barriers},
+    }
+
+class RiskAccumulator:
+    """
+    Online, mergeable accumulator for the risk metrics, so streamed blocks of paths can be analyzed.
+
+    VaR, CVaR and the drawdown distribution come from QuantilePathAccumulator sketches (exact until the
+    sketch first compacts); barrier hit probabilities are exact.
+
+    Attributes:
+        dt (float): Time step (in years) of the simulation.
+        alpha (float): Confidence level for VaR and CVaR.
+        barriers (tuple): Barrier prices.
+        sigma (float): Volatility for the bridge correction, or None for realized volatility.
+        losses (QuantilePathAccumulator): Sketch of the losses at every step.
+        drawdowns (QuantilePathAccumulator): Sketch of the maximum drawdowns.
+        hit_sums (numpy.ndarray): Sum of the hit probabilities of each barrier.
+        count (int): Number of paths seen.
+    """
+
+    def __init__(self, num_steps, dt, alpha=0.95, barriers=(), sigma=None, capacity=1024):
+        """
+        Initializes an empty accumulator.
+
+        Args:
+            num_steps (int): Number of steps per path (including time 0).
+            dt (float): Time step (in years) of the simulation.
+            alpha (float): Confidence level for VaR and CVaR. Default is 0.95.
+            barriers (sequence): Barrier prices to report hit probabilities for. Default is none.
+            sigma (float, optional): Volatility for the bridge correction. Defaults to None (realized volatility).
+            capacity (int): Capacity of the sketches. Default is 1024.
+
+        Returns:
+            None
+        """
+        self.dt = dt
+        self.alpha = alpha
+        self.barriers = tuple(barriers)
+        self.sigma = sigma
+        self.losses = QuantilePathAccumulator(num_steps, capacity)
+        self.drawdowns = QuantilePathAccumulator(1, capacity)
+        self.hit_sums = np.zeros(len(self.barriers))
+        self.count = 0
+
+    def update(self, simulated_paths):
+        """
+        Adds a block of paths.
+
+        Args:
+            simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+
+        Returns:
+            None
+        """
+        self.losses.update(path_losses(simulated_paths))
+        self.drawdowns.update(max_drawdowns(simulated_paths)[:, None])
+        for k, barrier in enumerate(self.barriers):
+            self.hit_sums[k] += np.sum(barrier_hit_probabilities(simulated_paths, barrier, self.dt, self.sigma))
+        self.count += len(simulated_paths)
+
+    def merge(self, other):
+        """
+        Merges another accumulator into this one.
+
+        Args:
+            other (RiskAccumulator): Accumulator to merge.
+
+        Returns:
+            RiskAccumulator: This accumulator.
+        """
+        self.losses.merge(other.losses)
+        self.drawdowns.merge(other.drawdowns)
+        self.hit_sums += other.hit_sums
+        self.count += other.count
+        return self
+
+    def result(self):
+        """
+        Returns:
+            dict: VaR and CVaR per step, drawdown quantiles, and the hit probability of each barrier.
+        """
+        var = self.losses.result((self.alpha,))[0]
+        samples, weights = self.losses.weighted_samples()
+        tail = samples >= var
+        cvar = np.sum(samples * tail * weights[:, None], axis=0) / np.sum(tail * weights[:, None], axis=0)
+
+        return {
+            'value_at_risk': var,
+            'conditional_value_at_risk': cvar,
+            'max_drawdown_quantiles': dict(zip((0.5, 0.95, 0.99), self.drawdowns.result((0.5, 0.95, 0.99))[:, 0])),
+            'barrier_hit_probabilities': dict(zip(self.barriers, self.hit_sums / self.count)),
+        }
@@ -1,12 +1,304 @@
 import numpy as np
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
 from sklearn.neighbors import KernelDensity
 from fetchStocks import StockData
+from parameterTypes import is_static, evaluate_static, make_estimator
 
-def simulate_stock_prices(stock_history: StockData, mu_function, sigma_function, T = 1, dt = 1/250, num_paths = 10):
+SAMPLING_SCHEMES = ("pseudo", "antithetic", "sobol")
+FAN_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+def generate_brownian_increments(num_paths, num_steps, dt, rng = None, scheme = "pseudo", replicates = 8, dtype = np.float64):
+    """
+    Draws the Brownian increments (shocks) for every path and step at once.
+
+    With the "pseudo" scheme the matrix is filled path by path, so it consumes the random stream in the
+    same order as drawing one increment per step inside a loop over paths. "antithetic" pairs every path
+    with its mirror image (rows 2k and 2k+1), and "sobol" uses scrambled Sobol points, split into
+    independently scrambled replicates, with Brownian bridge path construction.
+
+    Pseudo-random and antithetic shocks are drawn directly in the requested dtype when rng is a
+    numpy.random.Generator, so a float32 simulation never holds a float64 shock matrix.
+
+    Args:
+        num_paths (int): Number of paths to simulate.
+        num_steps (int): Number of time steps per path.
+        dt (float): Time step (in years) for simulation.
+        rng (numpy.random.Generator, optional): Random number generator to draw from. Defaults to None (the global numpy random state).
+        scheme (str): Sampling scheme, one of "pseudo", "antithetic" or "sobol". Default is "pseudo".
+        replicates (int): Number of independently scrambled Sobol blocks (only used by "sobol"). Default is 8.
+        dtype (numpy.dtype): Floating point type of the increments, e.g. numpy.float32 to halve memory. Default is numpy.float64.
+
+    Returns:
+        numpy.ndarray: Matrix of increments (shape: num_paths x num_steps).
+    """
+    if rng is None:
+        rng = np.random
+    if scheme == "pseudo":
+        return _normal_increments(rng, (num_paths, num_steps), dt, dtype)
+    if scheme == "antithetic":
+        dW = np.empty((num_paths, num_steps), dtype=dtype)
+        draws = _normal_increments(rng, ((num_paths + 1) // 2, num_steps), dt, dtype)
+        dW[0::2] = draws
+        dW[1::2] = -draws[:num_paths // 2]
+        return dW
+    if scheme == "sobol":
+        return np.concatenate([sobol_brownian_increments(len(block), num_steps, dt, rng) for block in np.array_split(np.arange(num_paths), replicates) if len(block)]).astype(dtype, copy=False)
+    raise ValueError(f"scheme must be one of {SAMPLING_SCHEMES}")
+
+def _normal_increments(rng, size, dt, dtype):
+    """
+    Draws normal increments with variance dt, in dtype when the generator supports it.
+    """
+    if np.dtype(dtype) == np.float64 or not isinstance(rng, np.random.Generator):
+        # float64 keeps the stream of rng.normal; the legacy global state can only draw float64
+        return rng.normal(0, np.sqrt(dt), size=size).astype(dtype, copy=False)
+    dW = rng.standard_normal(size, dtype=dtype)
+    dW *= np.sqrt(dt)
+    return dW
+
+def sobol_brownian_increments(num_paths, num_steps, dt, rng = None):
+    """
+    Draws Brownian increments from one scrambled Sobol sequence, using Brownian bridge construction so
+    that the first (best distributed) Sobol dimensions decide the coarse shape of each path.
+
+    Sobol points are best balanced when num_paths is a power of two.
+
+    Args:
+        num_paths (int): Number of paths to simulate.
+        num_steps (int): Number of time steps per path.
+        dt (float): Time step (in years) for simulation.
+        rng (numpy.random.Generator, optional): Random number generator for the scrambling. Defaults to None (the global numpy random state).
+
+    Returns:
+        numpy.ndarray: Matrix of increments (shape: num_paths x num_steps).
+    """
+    from scipy.stats import qmc
+    from scipy.special import ndtri
+
+    if not isinstance(rng, np.random.Generator):
+        rng = np.random.default_rng((rng or np.random).randint(0, 2**31 - 1))
+    uniforms = qmc.Sobol(num_steps, scramble=True, seed=rng).random(num_paths)
+    normals = ndtri(np.clip(uniforms, 1e-12, 1 - 1e-12))
+    return brownian_bridge(normals, dt)
+
+def brownian_bridge(normals, dt):
+    """
+    Builds Brownian increments with Brownian bridge construction: the first column sets the end point,
+    the next the midpoint, then the quarter points and so on.
+
+    Args:
+        normals (numpy.ndarray): Standard normal draws (shape: num_paths x num_steps).
+        dt (float): Time step (in years) for simulation.
+
+    Returns:
+        numpy.ndarray: Matrix of increments (shape: num_paths x num_steps).
+    """
+    num_paths, num_steps = normals.shape
+    W = np.zeros((num_paths, num_steps+1))
+    W[:, num_steps] = np.sqrt(num_steps * dt) * normals[:, 0]
+
+    k = 1
+    intervals = [(0, num_steps)]
+    while intervals:
+        next_intervals = []
+        for left, right in intervals:
+            if right - left < 2:
+                continue
+            middle = (left + right) // 2
+            weight = (middle - left) / (right - left)
+            std = np.sqrt((middle - left) * (right - middle) / (right - left) * dt)
+            W[:, middle] = W[:, left] + weight * (W[:, right] - W[:, left]) + std * normals[:, k]
+            k += 1
+            next_intervals += [(left, middle), (middle, right)]
+        intervals = next_intervals
+
+    return np.diff(W, axis=1)
+
+def variance_reduction(simulated_paths, scheme = "pseudo", replicates = 8):
+    """
+    Reports the variance reduction a sampling scheme achieved for the mean terminal price.
+
+    The variance of the scheme's estimator (from antithetic pair averages, or from the spread between
+    Sobol replicates) is compared to the variance plain Monte Carlo would have with the same number of paths.
+
+    Args:
+        simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        scheme (str): Sampling scheme the paths were drawn with. Default is "pseudo".
+        replicates (int): Number of Sobol replicates the paths were drawn with. Default is 8.
+
+    Returns:
+        dict: Scheme name, estimator variance, plain Monte Carlo variance and their ratio (variance reduction factor).
+    """
+    terminal = simulated_paths[:, -1]
+    plain_variance = np.var(terminal, ddof=1) / len(terminal)
+
+    if scheme == "pseudo":
+        estimator_variance = plain_variance
+    elif scheme == "antithetic":
+        pairs = len(terminal) // 2
+        pair_means = (terminal[0:2*pairs:2] + terminal[1:2*pairs:2]) / 2
+        estimator_variance = np.var(pair_means, ddof=1) / pairs
+    elif scheme == "sobol":
+        replicate_means = [np.mean(terminal[block]) for block in np.array_split(np.arange(len(terminal)), replicates) if len(block)]
+        estimator_variance = np.var(replicate_means, ddof=1) / len(replicate_means)
+    else:
+        raise ValueError(f"scheme must be one of {SAMPLING_SCHEMES}")
+
+    return {
+        'scheme': scheme,
+        'estimator_variance': estimator_variance,
+        'plain_variance': plain_variance,
+        'variance_reduction': plain_variance / estimator_variance,
+    }
+
+class CommonRandomNumbers:
+    """
+    Source of common random numbers: draws one shock matrix and hands the same matrix to every
+    simulation asking for that shape, so different parameter methods are compared on identical noise.
+
+    Attributes:
+        rng (numpy.random.Generator): Random number generator the shocks are drawn from.
+        shocks (dict): Shock matrices drawn so far, keyed by (num_paths, num_steps, dt).
+    """
+
+    def __init__(self, rng = None, scheme = "pseudo"):
+        """
+        Initializes the source.
+
+        Args:
+            rng (numpy.random.Generator, optional): Random number generator to draw from. Defaults to None (the global numpy random state).
+            scheme (str): Sampling scheme, see generate_brownian_increments. Default is "pseudo".
+
+        Returns:
+            None
+        """
+        self.rng = rng
+        self.scheme = scheme
+        self.shocks = dict()
+
+    def increments(self, num_paths, num_steps, dt, dtype = np.float64):
+        """
+        Returns the shock matrix for the given shape, drawing it the first time it is requested.
+
+        Other dtypes are cast from the float64 matrix, so every precision sees the same noise.
+
+        Args:
+            num_paths (int): Number of paths to simulate.
+            num_steps (int): Number of time steps per path.
+            dt (float): Time step (in years) for simulation.
+            dtype (numpy.dtype): Floating point type of the increments. Default is numpy.float64.
+
+        Returns:
+            numpy.ndarray: Matrix of increments (shape: num_paths x num_steps).
+        """
+        key = (num_paths, num_steps, dt)
+        if key not in self.shocks:
+            self.shocks[key] = generate_brownian_increments(num_paths, num_steps, dt, self.rng, self.scheme)
+        if np.dtype(dtype) == np.float64:
+            return self.shocks[key]
+        cast_key = key + (np.dtype(dtype),)
+        if cast_key not in self.shocks:
+            self.shocks[cast_key] = self.shocks[key].astype(dtype)
+        return self.shocks[cast_key]
+
+def simulate_gbm_paths(initial_price, mu, sigma, dW, dt, dtype = np.float64):
+    """
+    Builds Geometric Brownian Motion paths from a matrix of increments with a cumulative sum in log space.
+
+    The log increments, their cumulative sum and the exponential are computed in place in the returned
+    matrix, so no temporaries of the full matrix size are allocated.
+
+    Args:
+        initial_price (float): Stock price at time 0.
+        mu (float or numpy.ndarray): Drift parameter, either a constant or an array broadcastable to dW.
+        sigma (float or numpy.ndarray): Volatility parameter, either a constant or an array broadcastable to dW.
+        dW (numpy.ndarray): Brownian increments (shape: num_paths x num_steps).
+        dt (float): Time step (in years) for simulation.
+        dtype (numpy.dtype): Floating point type of the returned matrix, e.g. numpy.float32 to halve memory. Default is numpy.float64.
+
+    Returns:
+        numpy.ndarray: Matrix describing the multiple paths (shape: num_paths x num_steps+1).
+    """
+    num_paths, num_steps = dW.shape
+    prices = np.empty((num_paths, num_steps+1), dtype=dtype)
+    prices[:, 0] = initial_price
+
+    log_prices = prices[:, 1:]
+    np.multiply(sigma, dW, out=log_prices)
+    log_prices += (mu - 0.5 * sigma**2) * dt
+    np.cumsum(log_prices, axis=1, out=log_prices)
+    np.exp(log_prices, out=log_prices)
+    log_prices *= initial_price
+    return prices
+
+def simulate_stock_prices_batch(stock_history: StockData, mu, sigma, T = 1, dt = 1/250, num_paths = 10, rng = None, dW = None, scheme = "pseudo", dtype = np.float64):
+    """
+    Simulates future stock prices for all paths at once using the Geometric Brownian Motion (GBM) model.
+
+    Unlike simulate_stock_prices, the drift and volatility are values rather than parameter functions,
+    so the whole shock matrix can be drawn in one call and the paths built without a Python loop.
+    simulate_stock_prices uses it whenever both parameter functions are static.
+
+    Args:
+        stock_history (StockData): Object containing historical stock data.
+        mu (float or numpy.ndarray): Drift parameter, either a constant or an array broadcastable to (num_paths, steps).
+        sigma (float or numpy.ndarray): Volatility parameter, either a constant or an array broadcastable to (num_paths, steps).
+        T (float): Time horizon (in years) for simulation. Default is 1.
+        dt (float): Time step (in years) for simulation. Default is 1/250 (1 trading day).
+        num_paths (int): Number of paths to simulate. Default is 10.
+        rng (numpy.random.Generator, optional): Random number generator to draw from. Defaults to None (the global numpy random state).
+        dW (numpy.ndarray, optional): Brownian increments to use instead of drawing new ones (shape: num_paths x int(T/dt)). Defaults to None.
+        scheme (str): Sampling scheme for the increments, one of "pseudo", "antithetic" or "sobol". Default is "pseudo".
+        dtype (numpy.dtype): Floating point type of the returned matrix, e.g. numpy.float32 to halve memory. Default is numpy.float64.
+
+    Returns:
+        numpy.ndarray: Matrix describing the multiple paths.
+    """
+    if dW is None:
+        dW = generate_brownian_increments(num_paths, int(T/dt), dt, rng, scheme, dtype=dtype)
+    return simulate_gbm_paths(stock_history.getMostCurrentPrice(), mu, sigma, dW, dt, dtype)
+
+def simulate_stock_prices_incremental(stock_history: StockData, mu_estimator, sigma_estimator, dW, dt, dtype = np.float64):
+    """
+    Simulates future stock prices step by step for all paths at once, using estimators that update
+    their parameters incrementally as each new simulated price arrives.
+
+    Args:
+        stock_history (StockData): Object containing historical stock data.
+        mu_estimator (object): Estimator for the drift parameter (see parameterTypes.make_estimator).
+        sigma_estimator (object): Estimator for the volatility parameter (see parameterTypes.make_estimator).
+        dW (numpy.ndarray): Brownian increments (shape: num_paths x num_steps).
+        dt (float): Time step (in years) for simulation.
+        dtype (numpy.dtype): Floating point type of the returned matrix, e.g. numpy.float32 to halve memory. Default is numpy.float64.
+
+    Returns:
+        numpy.ndarray: Matrix describing the multiple paths.
+    """
+    num_paths, num_steps = dW.shape
+    prices = np.zeros((num_paths, num_steps+1), dtype=dtype)
+    prices[:, 0] = stock_history.getMostCurrentPrice()
+
+    for j in range(1, num_steps+1):
+        # The estimators see every price up to (and including) the previous step
+        mu_estimator.update(prices[:, j-1])
+        sigma_estimator.update(prices[:, j-1])
+        mu = mu_estimator.estimate()
+        sigma = sigma_estimator.estimate()
+        prices[:, j] = prices[:, j-1] * np.exp((mu - 0.5 * sigma**2) * dt + sigma * dW[:, j-1])
+
+    return prices
+
+def simulate_stock_prices(stock_history: StockData, mu_function, sigma_function, T = 1, dt = 1/250, num_paths = 10, incremental = True, rng = None, dW = None, scheme = "pseudo", dtype = np.float64, jit = False):
     """
     Simulates future stock prices using the Geometric Brownian Motion (GBM) model.
 
+    Static parameter functions (see parameterTypes.py) are evaluated once rather than per path and step,
+    and if both are static the paths are built by the batched engine. Path-dependent functions with a
+    vectorized estimator are stepped for all paths at once unless incremental is False, optionally with
+    the Numba-compiled kernel in numbaKernels.py.
+
     Args:
         stock_history (StockData): Object containing historical stock data.
         mu_function (function): Function to compute the drift parameter (mu) for the GBM model.
@@ -14,12 +306,42 @@ def simulate_stock_prices(stock_history: StockData, mu_function, sigma_function,
         T (float): Time horizon (in years) for simulation. Default is 1.
         dt (float): Time step (in years) for simulation. Default is 1/250 (1 trading day).
         num_paths (int): Number of paths to simulate. Default is 10.
+        incremental (bool): Use vectorized estimators for path-dependent functions when available. Default is True.
+        rng (numpy.random.Generator, optional): Random number generator to draw from. Defaults to None (the global numpy random state).
+        dW (numpy.ndarray, optional): Brownian increments to use instead of drawing new ones (shape: num_paths x int(T/dt)). Defaults to None.
+        scheme (str): Sampling scheme for the increments, one of "pseudo", "antithetic" or "sobol". Default is "pseudo".
+        dtype (numpy.dtype): Floating point type of the returned matrix, e.g. numpy.float32 to halve memory. Default is numpy.float64.
+        jit (bool): Step vectorized estimators with the Numba kernel (falls back to NumPy without Numba). Default is False.
 
     Returns:
         numpy.ndarray: Matrix describing the multiple paths.
     """
+    # Generate random increments (Brownian motion) for every path and step up front
+    if dW is None:
+        dW = generate_brownian_increments(num_paths, int(T/dt), dt, rng, scheme, dtype=dtype)
+
+    # Static parameters only depend on the history, so they are computed once instead of per step
+    mu_static = is_static(mu_function)
+    sigma_static = is_static(sigma_function)
+    if mu_static:
+        mu = evaluate_static(mu_function, stock_history, T, dt)
+    if sigma_static:
+        sigma = evaluate_static(sigma_function, stock_history, T, dt)
+    if mu_static and sigma_static:
+        return simulate_stock_prices_batch(stock_history, mu, sigma, T, dt, num_paths, dW=dW, dtype=dtype)
+
+    if incremental:
+        mu_estimator = make_estimator(mu_function, stock_history, T, dt, num_paths)
+        sigma_estimator = make_estimator(sigma_function, stock_history, T, dt, num_paths)
+        if mu_estimator is not None and sigma_estimator is not None and jit:
+            # Imported here so Numba is only loaded when the compiled kernel is asked for
+            from numbaKernels import simulate_stock_prices_jit
+            return simulate_stock_prices_jit(stock_history, mu_estimator, sigma_estimator, dW, dt, dtype)
+        if mu_estimator is not None and sigma_estimator is not None:
+            return simulate_stock_prices_incremental(stock_history, mu_estimator, sigma_estimator, dW, dt, dtype)
+
     # Initialize arrays to store stock prices
-    prices = np.zeros((num_paths, int(T/dt)+1))
+    prices = np.zeros((num_paths, int(T/dt)+1), dtype=dtype)
     
     # Iterate over each path
     for i in range(num_paths):
@@ -28,85 +350,725 @@ def simulate_stock_prices(stock_history: StockData, mu_function, sigma_function,
         
         # Generate future stock prices using GBM
         for j in range(1, int(T/dt)+1):
-            # Generate random increments (Brownian motion)
-            dW = np.random.normal(0, np.sqrt(dt))
             # Update stock price using GBM formula
-            mu = mu_function(stock_history, prices, T, dt, i, j)
-            sigma = sigma_function(stock_history, prices, T, dt, i, j)
-            prices[i, j] = prices[i, j-1] * np.exp((mu - 0.5 * sigma**2) * dt + sigma * dW)
+            if not mu_static:
+                mu = mu_function(stock_history, prices, T, dt, i, j)
+            if not sigma_static:
+                sigma = sigma_function(stock_history, prices, T, dt, i, j)
+            prices[i, j] = prices[i, j-1] * np.exp((mu - 0.5 * sigma**2) * dt + sigma * dW[i, j-1])
     
     return prices
 
-def compute_cumulative_distance(simulated_paths):
+# Terminal-Only Simulation
+
+def simulate_terminal_prices(stock_history: StockData, mu_function, sigma_function, T = 1, dt = 1/250, num_paths = 10, rng = None):
+    """
+    Simulates only the stock price at the end of the horizon, without storing the intermediate steps.
+
+    If both parameter functions are static the terminal price is drawn from its exact lognormal law,
+    one draw per path. Otherwise the paths are stepped with the vectorized estimators, keeping only the
+    current price and the estimator state (O(num_paths) memory).
+
+    Args:
+        stock_history (StockData): Object containing historical stock data.
+        mu_function (function): Function to compute the drift parameter (mu) for the GBM model.
+        sigma_function (function): Function to compute the volatility parameter (sigma) for the GBM model.
+        T (float): Time horizon (in years) for simulation. Default is 1.
+        dt (float): Time step (in years) for simulation. Default is 1/250 (1 trading day).
+        num_paths (int): Number of paths to simulate. Default is 10.
+        rng (numpy.random.Generator, optional): Random number generator to draw from. Defaults to None (the global numpy random state).
+
+    Returns:
+        numpy.ndarray: Terminal price of each path.
+    """
+    if rng is None:
+        rng = np.random
+    num_steps = int(T/dt)
+    initial_price = stock_history.getMostCurrentPrice()
+
+    if is_static(mu_function) and is_static(sigma_function):
+        mu = evaluate_static(mu_function, stock_history, T, dt)
+        sigma = evaluate_static(sigma_function, stock_history, T, dt)
+        horizon = num_steps * dt
+        return initial_price * np.exp((mu - 0.5 * sigma**2) * horizon + sigma * np.sqrt(horizon) * rng.normal(0, 1, size=num_paths))
+
+    mu_estimator = make_estimator(mu_function, stock_history, T, dt, num_paths)
+    sigma_estimator = make_estimator(sigma_function, stock_history, T, dt, num_paths)
+    if mu_estimator is None or sigma_estimator is None:
+        raise ValueError("terminal-only simulation needs static parameter functions or ones with a vectorized estimator")
+
+    prices = np.full(num_paths, initial_price, dtype=np.float64)
+    for j in range(num_steps):
+        mu_estimator.update(prices)
+        sigma_estimator.update(prices)
+        mu = mu_estimator.estimate()
+        sigma = sigma_estimator.estimate()
+        prices = prices * np.exp((mu - 0.5 * sigma**2) * dt + sigma * rng.normal(0, np.sqrt(dt), size=num_paths))
+    return prices
+
+def summarize_terminal_prices(terminal_prices, quantiles = FAN_QUANTILES):
+    """
+    Summarizes the distribution of terminal prices.
+
+    Args:
+        terminal_prices (numpy.ndarray): Terminal price of each path.
+        quantiles (sequence): Quantiles to report, between 0 and 1. Default is FAN_QUANTILES.
+
+    Returns:
+        dict: Mean, standard deviation, minimum, maximum and quantiles of the terminal prices.
+    """
+    return {
+        'mean': np.mean(terminal_prices),
+        'std': np.std(terminal_prices, ddof=1) if len(terminal_prices) > 1 else 0.0,
+        'min': np.min(terminal_prices),
+        'max': np.max(terminal_prices),
+        'quantiles': dict(zip(quantiles, np.quantile(terminal_prices, quantiles))),
+    }
+
+# Closed-Form Summaries
+
+def analytic_gbm_summaries(stock_history: StockData, mu_function, sigma_function, T = 1, dt = 1/250, quantiles = FAN_QUANTILES):
+    """
+    Computes the mean, median and quantile paths of Geometric Brownian Motion exactly, without simulating.
+
+    With constant drift and volatility the price at time t is lognormal, so the mean path is S0*exp(mu*t),
+    the median path is S0*exp((mu - sigma^2/2)*t) and every quantile path is S0*exp((mu - sigma^2/2)*t + sigma*sqrt(t)*z).
+    The time grid matches the one simulate_stock_prices uses for the same T and dt.
+
+    Args:
+        stock_history (StockData): Object containing historical stock data.
+        mu_function (function): Static function to compute the drift parameter (mu).
+        sigma_function (function): Static function to compute the volatility parameter (sigma).
+        T (float): Time horizon (in years). Default is 1.
+        dt (float): Time step (in years). Default is 1/250 (1 trading day).
+        quantiles (sequence): Quantiles to compute paths for, between 0 and 1. Default is FAN_QUANTILES.
+
+    Returns:
+        dict: Initial price, mu, sigma, the time of each step, the mean and median paths, and the quantile paths keyed by quantile.
+    """
+    if not (is_static(mu_function) and is_static(sigma_function)):
+        raise ValueError("closed-form summaries need static parameter functions")
+    mu = evaluate_static(mu_function, stock_history, T, dt)
+    sigma = evaluate_static(sigma_function, stock_history, T, dt)
+    initial_price = stock_history.getMostCurrentPrice()
+
+    times = np.arange(int(T/dt) + 1) * dt
+    drift = (mu - 0.5 * sigma**2) * times
+    spread = sigma * np.sqrt(times)
+
+    return {
+        'initial_price': initial_price,
+        'mu': mu,
+        'sigma': sigma,
+        'times': times,
+        'mean_path': initial_price * np.exp(mu * times),
+        'median_path': initial_price * np.exp(drift),
+        'quantile_paths': {q: initial_price * np.exp(drift + spread * NormalDist().inv_cdf(q)) for q in quantiles},
+    }
+
+# Parallel Simulation
+
+# State shared by every block a worker process simulates, set once by _init_worker
+_WORKER_STATE = None
+
+def _init_worker(stock_history, mu_function, sigma_function, T, dt, incremental):
+    """
+    Stores the simulation inputs in a worker process so they are only sent once per worker.
+
+    Args:
+        stock_history (StockData): Object containing historical stock data.
+        mu_function (function): Function to compute the drift parameter (mu) for the GBM model.
+        sigma_function (function): Function to compute the volatility parameter (sigma) for the GBM model.
+        T (float): Time horizon (in years) for simulation.
+        dt (float): Time step (in years) for simulation.
+        incremental (bool): Use vectorized estimators for path-dependent functions when available.
+
+    Returns:
+        None
+    """
+    global _WORKER_STATE
+    _WORKER_STATE = (stock_history, mu_function, sigma_function, T, dt, incremental)
+
+def _simulate_block(block):
+    """
+    Simulates one block of paths from its own seed sequence.
+
+    Args:
+        block (tuple): (number of paths, numpy.random.SeedSequence, bit generator class) for the block.
+
+    Returns:
+        numpy.ndarray: Matrix describing the paths of the block.
+    """
+    block_paths, seed_sequence, bit_generator = block
+    stock_history, mu_function, sigma_function, T, dt, incremental = _WORKER_STATE
+    return simulate_stock_prices(stock_history, mu_function, sigma_function, T, dt, block_paths, incremental, np.random.Generator(bit_generator(seed_sequence)))
+
+def spawn_block_seeds(seed, num_blocks):
+    """
+    Spawns independent seed sequences for each block of paths.
+
+    The children are derived from the seed alone, so the same seed always gives the same streams.
+
+    Args:
+        seed (int or numpy.random.SeedSequence): Root seed. None draws fresh entropy.
+        num_blocks (int): Number of blocks.
+
+    Returns:
+        list: numpy.random.SeedSequence for each block.
+    """
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return [np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (k,), pool_size=root.pool_size) for k in range(num_blocks)]
+
+def simulate_stock_prices_parallel(stock_history: StockData, mu_function, sigma_function, T = 1, dt = 1/250, num_paths = 10, seed = None, max_workers = None, block_size = 1000, incremental = True, bit_generator = np.random.PCG64):
+    """
+    Simulates future stock prices across a pool of processes.
+
+    Paths are split into fixed blocks, each drawing from its own stream spawned from the seed, and the
+    blocks are put back together in order. The result therefore only depends on the seed and the block
+    size, and is bit-identical whatever the number of workers.
+
+    Args:
+        stock_history (StockData): Object containing historical stock data.
+        mu_function (function): Function to compute the drift parameter (mu) for the GBM model.
+        sigma_function (function): Function to compute the volatility parameter (sigma) for the GBM model.
+        T (float): Time horizon (in years) for simulation. Default is 1.
+        dt (float): Time step (in years) for simulation. Default is 1/250 (1 trading day).
+        num_paths (int): Number of paths to simulate. Default is 10.
+        seed (int or numpy.random.SeedSequence, optional): Root seed for the block streams. Defaults to None (fresh entropy).
+        max_workers (int, optional): Number of worker processes. Defaults to None (one per core).
+        block_size (int): Number of paths per block. Default is 1000.
+        incremental (bool): Use vectorized estimators for path-dependent functions when available. Default is True.
+        bit_generator (type): Bit generator class the block streams are built with, e.g. numpy.random.Philox. Default is numpy.random.PCG64.
+
+    Returns:
+        numpy.ndarray: Matrix describing the multiple paths.
+    """
+    block_sizes = [min(block_size, num_paths - start) for start in range(0, num_paths, block_size)]
+    blocks = [(size, block_seed, bit_generator) for size, block_seed in zip(block_sizes, spawn_block_seeds(seed, len(block_sizes)))]
+    initargs = (stock_history, mu_function, sigma_function, T, dt, incremental)
+
+    if max_workers == 1:
+        _init_worker(*initargs)
+        results = [_simulate_block(block) for block in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=initargs) as executor:
+            results = list(executor.map(_simulate_block, blocks))
+
+    return np.concatenate(results)
+
+def compute_cumulative_distance(simulated_paths, rows = None, max_block_bytes = 64 * 2**20):
     """
     Computes the cumulative distance to all other paths for each path.
 
+    Pairwise Euclidean distances come from blocked Gram matrices, ||a - b||^2 = ||a||^2 + ||b||^2 - 2 a.b,
+    with the paths centred on the mean path first to limit cancellation. The block size is chosen so that
+    the one block of distances and the blocks of paths it is computed from fit in max_block_bytes together,
+    and the distances are computed in place, so memory stays under the ceiling however many paths there are.
+
     Args:
         simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        rows (numpy.ndarray, optional): Indices of the paths to compute cumulative distances for. Defaults to None (all paths).
+        max_block_bytes (int): Memory ceiling for the working buffers. Default is 64 MiB.
 
     Returns:
         numpy.ndarray: Array containing cumulative distances.
     """
-    num_paths = len(simulated_paths)
-    cumulative_distances = np.zeros(num_paths)
-    
-    for i in range(num_paths):
-        cumulative_distance = 0
-        for j in range(num_paths):
-            if i != j:
-                # Compute Euclidean distance between paths i and j
-                distance = np.linalg.norm(simulated_paths[i] - simulated_paths[j])
-                cumulative_distance += distance
-        cumulative_distances[i] = cumulative_distance
+    num_paths, num_steps = simulated_paths.shape
+    if rows is None:
+        rows = np.arange(num_paths)
+    block = _distance_block_size(num_steps, max_block_bytes)
+    center = compute_mean_path(simulated_paths, block)
+    buffer = np.empty(block * block)
+
+    cumulative_distances = np.zeros(len(rows))
+    for row_start in range(0, len(rows), block):
+        row_index = rows[row_start:row_start+block]
+        row_paths, row_norms = _centred_block(simulated_paths, row_index, center)
+
+        for col_start in range(0, num_paths, block):
+            col_paths, col_norms = _centred_block(simulated_paths, slice(col_start, col_start+block), center)
+            distances = buffer[:len(row_paths) * len(col_paths)].reshape(len(row_paths), len(col_paths))
+            _pairwise_distances(row_paths, row_norms, col_paths, col_norms, distances)
+
+            # A path's distance to itself is 0, rounding aside
+            local = row_index - col_start
+            same = (local >= 0) & (local < len(col_paths))
+            distances[np.nonzero(same)[0], local[same]] = 0
+            cumulative_distances[row_start:row_start+block] += np.sum(distances, axis=1)
     
     return cumulative_distances
 
-def select_middle_path(simulated_paths):
+def _distance_block_size(num_steps, max_block_bytes):
+    """
+    Returns the largest block of paths b whose working buffers fit in max_block_bytes: one b x b float64
+    distance block, and four b x num_steps float64 path blocks (the row and column blocks, each alive
+    together with its successor while that is read).
+    """
+    available = max_block_bytes / 8
+    return max(1, int((-4 * num_steps + np.sqrt(16 * num_steps**2 + 4 * available)) / 2))
+
+def _centred_block(simulated_paths, index, center):
+    """
+    Reads a block of paths as float64, centred on center, with their squared norms.
+    """
+    paths = simulated_paths[index]
+    # A slice is a view of the caller's matrix, fancy indexing already returns a copy
+    if isinstance(index, slice) or paths.dtype != np.float64:
+        paths = np.array(paths, dtype=np.float64)
+    paths -= center
+    return paths, np.einsum('ij,ij->i', paths, paths)
+
+def _pairwise_distances(row_paths, row_norms, col_paths, col_norms, out):
+    """
+    Writes the Euclidean distances between two centred blocks of paths into out, without temporaries.
+    """
+    np.matmul(row_paths, col_paths.T, out=out)
+    out *= -2
+    out += row_norms[:, None]
+    out += col_norms[None, :]
+    np.maximum(out, 0, out=out)
+    np.sqrt(out, out=out)
+    return out
+
+def approximate_middle_path_index(simulated_paths, sample_size = 1000, max_candidates = 200, delta = 0.01, rng = None, max_block_bytes = 64 * 2**20):
+    """
+    Finds a path with (close to) the smallest cumulative distance without computing every pairwise distance.
+
+    Each path's mean distance to all paths is estimated from reference paths drawn with replacement, by
+    successive elimination: distances lie in [0, D] with D = 2 * max ||path - mean path||, so by the
+    empirical Bernstein inequality (Maurer and Pontil) and a union bound, with probability at least
+    1 - delta every estimate from n references is within eps_i = sqrt(2 * V_i * L / n) + 7 * D * L / (3 * (n - 1))
+    of its true value in every round, where V_i is the sample variance of the path's distances to the
+    references and L = ln(4 * num_paths * rounds / delta). Paths whose lower bound is above the smallest
+    upper bound are dropped, and the number of references is doubled for the rest until at most
+    max_candidates remain or the references outnumber half the paths. The remaining paths with the lowest
+    estimates (at most max_candidates) are then scored exactly.
+
+    If no remaining path was cut by max_candidates the exact middle path is found and the bound is 0;
+    otherwise the bound compares the returned path to the lower bounds of the paths that were not scored.
+
+    Args:
+        simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        sample_size (int): Number of reference paths in the first round. Default is 1000.
+        max_candidates (int): Maximum number of paths scored exactly. Default is 200.
+        delta (float): Allowed probability that the error bound does not hold. Default is 0.01.
+        rng (numpy.random.Generator, optional): Random number generator for the sample. Defaults to None (the global numpy random state).
+        max_block_bytes (int): Memory ceiling for the working buffers. Default is 64 MiB.
+
+    Returns:
+        tuple: (index of the middle path, bound on how far its cumulative distance is above the smallest, as
+            a fraction of the smallest)
+    """
+    if rng is None:
+        rng = np.random
+    num_paths, num_steps = simulated_paths.shape
+    block = _distance_block_size(num_steps, max_block_bytes)
+    center = compute_mean_path(simulated_paths, block)
+    buffer = np.empty(block * block)
+
+    rounds = int(np.ceil(np.log2(max(num_paths / (2 * sample_size), 1)))) + 1
+    log_term = np.log(4 * num_paths * rounds / delta)
+    sums = np.zeros(num_paths)
+    squares = np.zeros(num_paths)
+    survivors = np.arange(num_paths)
+    radius = 0.0
+    num_references = 0
+    new_references = sample_size
+    while True:
+        references = np.sort(rng.choice(num_paths, size=new_references))
+        for start in range(0, len(survivors), block):
+            rows = survivors[start:start+block]
+            paths, norms = _centred_block(simulated_paths, rows, center)
+            radius = max(radius, np.sqrt(np.max(norms)))
+            for reference_start in range(0, len(references), block):
+                reference, reference_norms = _centred_block(simulated_paths, references[reference_start:reference_start+block], center)
+                distances = buffer[:len(paths) * len(reference)].reshape(len(paths), len(reference))
+                _pairwise_distances(paths, norms, reference, reference_norms, distances)
+                sums[rows] += np.sum(distances, axis=1)
+                squares[rows] += np.einsum('ij,ij->i', distances, distances)
+        num_references += new_references
+
+        estimates = sums[survivors] / num_references
+        variances = np.maximum(squares[survivors] - num_references * estimates**2, 0) / (num_references - 1)
+        eps = np.sqrt(2 * variances * log_term / num_references) + 7 * 2 * radius * log_term / (3 * (num_references - 1))
+        lower = np.maximum(estimates - eps, 0)
+        plausible = lower <= np.min(estimates + eps)
+        survivors, estimates, lower = survivors[plausible], estimates[plausible], lower[plausible]
+        if len(survivors) <= max_candidates or 2 * num_references > num_paths:
+            break
+        new_references = num_references
+
+    # Free the sampling buffers before the exact scoring allocates its own
+    del buffer, distances, paths, reference
+    order = np.argsort(estimates)
+    candidates = np.sort(survivors[order[:max_candidates]])
+    cumulative_distances = compute_cumulative_distance(simulated_paths, candidates, max_block_bytes)
+    best = np.argmin(cumulative_distances)
+    smallest_bound = cumulative_distances[best]
+    if len(survivors) > max_candidates:
+        smallest_bound = min(smallest_bound, num_paths * np.min(lower[order[max_candidates:]]))
+    error_bound = (cumulative_distances[best] - smallest_bound) / smallest_bound if smallest_bound > 0 else np.inf
+    return candidates[best], error_bound
+
+def select_middle_path(simulated_paths, approximate = False, sample_size = 1000, max_candidates = 200, delta = 0.01, rng = None):
     """
     Selects the path with the smallest cumulative distance.
 
     Args:
         simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        approximate (bool): Use the sampled search in approximate_middle_path_index, for very many paths. Default is False.
+        sample_size (int): Number of reference paths in the first round of the approximate search. Default is 1000.
+        max_candidates (int): Maximum number of paths the approximate search scores exactly. Default is 200.
+        delta (float): Allowed probability that the approximate search's error bound does not hold. Default is 0.01.
+        rng (numpy.random.Generator, optional): Random number generator for the approximate search. Defaults to None.
 
     Returns:
-        numpy.ndarray: The middle path.
+        numpy.ndarray: The middle path, or with approximate=True a tuple (middle path, bound on how far its
+            cumulative distance is above the smallest, as a fraction of the smallest), see approximate_middle_path_index.
     """
+    if approximate:
+        middle_path_index, error_bound = approximate_middle_path_index(simulated_paths, sample_size, max_candidates, delta, rng)
+        return simulated_paths[middle_path_index], error_bound
     cumulative_distances = compute_cumulative_distance(simulated_paths)
     middle_path_index = np.argmin(cumulative_distances)
     middle_path = simulated_paths[middle_path_index]
     return middle_path
 
-def compute_median_path(simulated_paths):
+def _partition_quantiles(values, quantiles):
+    """
+    Computes exact quantiles along the first axis with np.partition, interpolating linearly like np.quantile.
+
+    Args:
+        values (numpy.ndarray): Matrix of values (shape: num_paths x num_steps).
+        quantiles (sequence): Quantiles to compute, between 0 and 1.
+
+    Returns:
+        numpy.ndarray: Quantiles (shape: len(quantiles) x num_steps).
+    """
+    positions = np.asarray(quantiles, dtype=np.float64) * (len(values) - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.ceil(positions).astype(int)
+    partitioned = np.partition(values, np.unique(np.concatenate([lower, upper])), axis=0)
+    fraction = (positions - lower)[:, None]
+    return partitioned[lower] + fraction * (partitioned[upper] - partitioned[lower])
+
+def compute_quantile_paths(simulated_paths, quantiles = FAN_QUANTILES, chunk_size = None, capacity = 1024):
+    """
+    Computes several per-step quantile paths (e.g. fan bands) in one pass.
+
+    A matrix is handled exactly with np.partition. An iterable of path blocks (e.g. from
+    simulate_stock_prices_chunked), or a matrix read in blocks of chunk_size paths, is summarised with
+    the streaming QuantilePathAccumulator sketch, so a memory-mapped file is read once, front to back.
+
+    Args:
+        simulated_paths (numpy.ndarray or iterable): Matrix containing simulated stock prices, or blocks of it.
+        quantiles (sequence): Quantiles to compute, between 0 and 1. Default is FAN_QUANTILES (5/25/50/75/95%).
+        chunk_size (int, optional): If given, read the matrix (e.g. a numpy.memmap) chunk_size paths at a time. Defaults to None.
+        capacity (int): Capacity of the sketch used for blocks of paths. Default is 1024.
+
+    Returns:
+        numpy.ndarray: Quantile paths (shape: len(quantiles) x num_steps).
+    """
+    if isinstance(simulated_paths, np.ndarray) and chunk_size is None:
+        return _partition_quantiles(simulated_paths, quantiles)
+
+    chunks = simulated_paths
+    if isinstance(simulated_paths, np.ndarray):
+        # Blocks of whole rows follow the file layout; blocks of steps would touch every page of a memmap
+        chunks = (simulated_paths[start:start+chunk_size] for start in range(0, len(simulated_paths), chunk_size))
+    accumulator = None
+    for chunk in chunks:
+        if accumulator is None:
+            accumulator = QuantilePathAccumulator(chunk.shape[1], capacity)
+        accumulator.update(chunk)
+    return accumulator.result(quantiles)
+
+def compute_median_path(simulated_paths, chunk_size = None):
     """
     Computes the median path from simulated paths.
 
     Args:
         simulated_paths (numpy.ndarray): Matrix containing simulated stock prices.
+        chunk_size (int, optional): If given, read the matrix (e.g. a numpy.memmap) chunk_size paths at a time
+            and estimate the median with the streaming sketch. Defaults to None.
 
     Returns:
         numpy.ndarray: Median path.
     """
-    num_paths, num_steps = simulated_paths.shape
-    median_path = np.zeros(num_steps)
-    
-    for i in range(num_steps):
-        # Extract prices at time step i from all paths
-        prices_at_step_i = simulated_paths[:, i]
-        # Compute median price at time step i
-        median_price = np.median(prices_at_step_i)
-        # Store median price in median path
-        median_path[i] = median_price
-    
-    return median_path
+    return compute_quantile_paths(simulated_paths, (0.5,), chunk_size)[0]
 
-def compute_mean_path(simulated_prices):
+def compute_mean_path(simulated_prices, chunk_size = None):
     """
     Computes the mean path from simulated prices.
 
     Args:
         simulated_prices (numpy.ndarray): Matrix containing simulated stock prices.
+        chunk_size (int, optional): If given, read the matrix (e.g. a numpy.memmap) this many paths at a time. Defaults to None.
 
     Returns:
         numpy.ndarray: Mean path.
     """
-    return np.mean(simulated_prices, axis=0)
\ No newline at end of file
+    if chunk_size is not None:
+        accumulator = MeanPathAccumulator(simulated_prices.shape[1])
+        for start in range(0, len(simulated_prices), chunk_size):
+            accumulator.update(simulated_prices[start:start+chunk_size])
+        return accumulator.result()
+    return np.mean(simulated_prices, axis=0)
+
+# Streaming Simulation And Online Path Summaries
+
+def simulate_stock_prices_chunked(stock_history: StockData, mu_function, sigma_function, T = 1, dt = 1/250, num_paths = 10, chunk_size = 10000, incremental = True, rng = None, scheme = "pseudo", dtype = np.float64):
+    """
+    Simulates future stock prices in blocks of paths, so only one block is held in memory at a time.
+
+    Blocks draw their shocks in the same order as a single call, so concatenating the blocks gives the
+    same matrix as simulate_stock_prices with the same random state.
+
+    Args:
+        stock_history (StockData): Object containing historical stock data.
+        mu_function (function): Function to compute the drift parameter (mu) for the GBM model.
+        sigma_function (function): Function to compute the volatility parameter (sigma) for the GBM model.
+        T (float): Time horizon (in years) for simulation. Default is 1.
+        dt (float): Time step (in years) for simulation. Default is 1/250 (1 trading day).
+        num_paths (int): Total number of paths to simulate. Default is 10.
+        chunk_size (int): Maximum number of paths per block. Default is 10000.
+        incremental (bool): Use vectorized estimators for path-dependent functions when available. Default is True.
+        rng (numpy.random.Generator, optional): Random number generator to draw from. Defaults to None (the global numpy random state).
+        scheme (str): Sampling scheme for the increments of each block. Default is "pseudo".
+        dtype (numpy.dtype): Floating point type of the returned matrix, e.g. numpy.float32 to halve memory. Default is numpy.float64.
+
+    Yields:
+        numpy.ndarray: Matrix describing a block of paths (shape: block_size x num_steps).
+    """
+    for start in range(0, num_paths, chunk_size):
+        block_size = min(chunk_size, num_paths - start)
+        yield simulate_stock_prices(stock_history, mu_function, sigma_function, T, dt, block_size, incremental, rng, scheme=scheme, dtype=dtype)
+
+def simulate_stock_prices_memmap(stock_history: StockData, mu_function, sigma_function, filename, T = 1, dt = 1/250, num_paths = 10, chunk_size = 10000, incremental = True, rng = None, scheme = "pseudo", dtype = np.float32):
+    """
+    Simulates future stock prices straight into a numpy.memmap on disk, one block of paths at a time,
+    so path counts larger than memory can be simulated.
+
+    Args:
+        stock_history (StockData): Object containing historical stock data.
+        mu_function (function): Function to compute the drift parameter (mu) for the GBM model.
+        sigma_function (function): Function to compute the volatility parameter (sigma) for the GBM model.
+        filename (str): File to write the matrix to (it is created or overwritten).
+        T (float): Time horizon (in years) for simulation. Default is 1.
+        dt (float): Time step (in years) for simulation. Default is 1/250 (1 trading day).
+        num_paths (int): Total number of paths to simulate. Default is 10.
+        chunk_size (int): Maximum number of paths simulated and held in memory at once. Default is 10000.
+        incremental (bool): Use vectorized estimators for path-dependent functions when available. Default is True.
+        rng (numpy.random.Generator, optional): Random number generator to draw from. Defaults to None (the global numpy random state).
+        scheme (str): Sampling scheme for the increments of each block. Default is "pseudo".
+        dtype (numpy.dtype): Floating point type stored in the file. Default is numpy.float32.
+
+    Returns:
+        numpy.memmap: Matrix describing the multiple paths, backed by the file.
+    """
+    prices = np.memmap(filename, dtype=dtype, mode='w+', shape=(num_paths, int(T/dt)+1))
+    start = 0
+    for block in simulate_stock_prices_chunked(stock_history, mu_function, sigma_function, T, dt, num_paths, chunk_size, incremental, rng, scheme, dtype):
+        prices[start:start+len(block)] = block
+        start += len(block)
+    prices.flush()
+    return prices
+
+def accumulate_chunks(chunks, *accumulators):
+    """
+    Feeds every block of paths to each accumulator.
+
+    Args:
+        chunks (iterable): Blocks of simulated paths, e.g. from simulate_stock_prices_chunked.
+        *accumulators: Objects with an update(paths) method.
+
+    Returns:
+        tuple: The accumulators, after seeing every block.
+    """
+    for chunk in chunks:
+        for accumulator in accumulators:
+            accumulator.update(chunk)
+    return accumulators
+
+class MeanPathAccumulator:
+    """
+    Online, mergeable accumulator for the mean path.
+
+    Attributes:
+        total (numpy.ndarray): Sum of the prices at each step.
+        count (int): Number of paths seen.
+    """
+
+    def __init__(self, num_steps):
+        """
+        Initializes an empty accumulator.
+
+        Args:
+            num_steps (int): Number of steps per path (including time 0).
+
+        Returns:
+            None
+        """
+        self.total = np.zeros(num_steps)
+        self.count = 0
+
+    def update(self, paths):
+        """
+        Adds a block of paths.
+
+        Args:
+            paths (numpy.ndarray): Matrix containing simulated stock prices.
+
+        Returns:
+            None
+        """
+        self.total += np.sum(paths, axis=0, dtype=np.float64)
+        self.count += len(paths)
+
+    def merge(self, other):
+        """
+        Merges another accumulator into this one.
+
+        Args:
+            other (MeanPathAccumulator): Accumulator to merge.
+
+        Returns:
+            MeanPathAccumulator: This accumulator.
+        """
+        self.total += other.total
+        self.count += other.count
+        return self
+
+    def result(self):
+        """
+        Returns:
+            numpy.ndarray: Mean path.
+        """
+        return self.total / self.count
+
+class QuantilePathAccumulator:
+    """
+    Online, mergeable sketch of the per-step price distribution, used for quantile (and median) paths.
+
+    The sketch is a stack of compactors applied to every step at once: level k holds sorted samples
+    that each stand for 2**k paths. When a level grows past the capacity it is sorted per step and
+    every other sample is promoted to the next level, alternating the offset between compactions.
+    Memory is O(capacity * log(num_paths / capacity) * num_steps) and the rank error of a quantile is
+    of order 1/capacity. While fewer than capacity paths have been seen, results are exact.
+
+    Attributes:
+        levels (list): Compactor levels, each a matrix of samples (shape: samples x num_steps).
+        capacity (int): Maximum number of samples kept in a level before it is compacted.
+        count (int): Number of paths seen.
+    """
+
+    def __init__(self, num_steps, capacity = 1024):
+        """
+        Initializes an empty sketch.
+
+        Args:
+            num_steps (int): Number of steps per path (including time 0).
+            capacity (int): Maximum number of samples per level. Default is 1024.
+
+        Returns:
+            None
+        """
+        self.num_steps = num_steps
+        self.capacity = capacity
+        self.levels = []
+        self.count = 0
+        self.compactions = 0
+
+    def __add(self, level, samples):
+        """
+        Adds samples to a level, compacting it (and the levels above) if it grows past the capacity.
+
+        Args:
+            level (int): Level to add to.
+            samples (numpy.ndarray): Samples to add (shape: samples x num_steps).
+
+        Returns:
+            None
+        """
+        while len(self.levels) <= level:
+            self.levels.append(np.empty((0, self.num_steps)))
+        self.levels[level] = np.concatenate([self.levels[level], samples])
+
+        if len(self.levels[level]) > self.capacity:
+            data = np.sort(self.levels[level], axis=0)
+            even = len(data) - len(data) % 2
+            offset = self.compactions % 2
+            self.compactions += 1
+            self.levels[level] = data[even:]
+            self.__add(level + 1, data[offset:even:2])
+
+    def update(self, paths):
+        """
+        Adds a block of paths.
+
+        Args:
+            paths (numpy.ndarray): Matrix containing simulated stock prices.
+
+        Returns:
+            None
+        """
+        self.__add(0, np.asarray(paths, dtype=np.float64))
+        self.count += len(paths)
+
+    def merge(self, other):
+        """
+        Merges another sketch into this one.
+
+        Args:
+            other (QuantilePathAccumulator): Sketch to merge.
+
+        Returns:
+            QuantilePathAccumulator: This sketch.
+        """
+        for level, samples in enumerate(other.levels):
+            self.__add(level, samples)
+        self.count += other.count
+        return self
+
+    def weighted_samples(self):
+        """
+        Returns the samples kept by the sketch with the number of paths each stands for.
+
+        Returns:
+            tuple: (samples (shape: samples x num_steps), weights (shape: samples))
+        """
+        samples = np.concatenate(self.levels) if self.levels else np.empty((0, self.num_steps))
+        weights = np.concatenate([np.full(len(level), 2.0**k) for k, level in enumerate(self.levels)]) if self.levels else np.empty(0)
+        return samples, weights
+
+    def result(self, quantiles = (0.5,)):
+        """
+        Computes quantile paths from the sketch.
+
+        Args:
+            quantiles (sequence): Quantiles to compute, between 0 and 1. Default is (0.5,), the median.
+
+        Returns:
+            numpy.ndarray: Quantile paths (shape: len(quantiles) x num_steps).
+        """
+        samples, weights = self.weighted_samples()
+        if len(self.levels) == 1:
+            # Nothing has been compacted yet, so the samples are the paths themselves
+            return np.quantile(samples, quantiles, axis=0)
+
+        order = np.argsort(samples, axis=0)
+        sorted_samples = np.take_along_axis(samples, order, axis=0)
+        sorted_weights = weights[order]
+        cumulative = np.cumsum(sorted_weights, axis=0)
+        # Place each sample at the middle of the probability mass it stands for
+        positions = (cumulative - sorted_weights / 2) / cumulative[-1]
+
+        columns = np.arange(self.num_steps)
+        paths = np.empty((len(quantiles), self.num_steps))
+        for k, q in enumerate(quantiles):
+            upper = np.clip(np.sum(positions < q, axis=0), 1, len(samples) - 1)
+            lower = upper - 1
+            p_lower, p_upper = positions[lower, columns], positions[upper, columns]
+            fraction = np.clip((q - p_lower) / (p_upper - p_lower), 0, 1)
+            paths[k] = sorted_samples[lower, columns] + fraction * (sorted_samples[upper, columns] - sorted_samples[lower, columns])
+        return paths